@@ -0,0 +1,212 @@
+#!/usr/local/bin/python3
+
+# mplWindow, a wrapper around matplotlib for GUI applications using tkinter
+# Copyright (C) 2014 Alex Zylstra
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark rendering for every plot type over a range of data sizes, without a display (using `Renderer`, which
+draws to an Agg canvas). Each case is timed for construction (including the first draw), a full replot, toggling the
+log scale and the legend, and resizing. The memory held by the renderer's data and caches is recorded, and the memory
+allocated by constructing it (including the copies held by artists) is measured with `tracemalloc`. The results are written as
+JSON so that runs can be compared::
+
+    python3 bench.py --max-points 1e6 --output bench_output.txt
+"""
+
+__author__ = 'Alex Zylstra'
+
+from mplWindow import Renderer
+import matplotlib
+import numpy as np
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+# Plot types by name, for the command line:
+TYPES = {'plot': Renderer.TYPE_PLOT, 'errorbar': Renderer.TYPE_ERRORBAR, 'bar': Renderer.TYPE_BAR,
+         'histogram': Renderer.TYPE_HISTOGRAM, 'histogram2d': Renderer.TYPE_2DHISTOGRAM,
+         'contour': Renderer.TYPE_CONTOUR, 'image': Renderer.TYPE_IMAGE, 'colormesh': Renderer.TYPE_COLORMESH,
+         'dateplot': Renderer.TYPE_DATEPLOT, 'vector': Renderer.TYPE_VECTOR}
+# Total numbers of points, split between the series:
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7, 10**8]
+SERIES = [1, 10, 100, 1000]
+# The size to resize the figure to, in inches:
+RESIZE = (8, 6)
+
+def makeData(plotType, points, series, rng):
+    """Make random data in the layout a plot type takes.
+
+    :param plotType: The plot type
+    :param points: The total number of points, which is rounded to a square grid for grid types
+    :param series: The number of series to split the points between, ignored for grid types
+    :param rng: The `numpy.random.Generator` to use
+    """
+    if plotType in Renderer.GRID_TYPES:
+        side = max(int(round(points ** 0.5)), 2)
+        y, x = np.mgrid[0:1:side*1j, 0:1:side*1j]
+        return np.sin(8 * x) * np.cos(6 * y) + 0.1 * rng.standard_normal((side, side)) + 2
+    n = points // series
+    if plotType == Renderer.TYPE_HISTOGRAM:
+        data = rng.standard_normal((series, n))
+    elif plotType == Renderer.TYPE_VECTOR:
+        data = np.empty((series, 4, n))
+        data[:, :2] = rng.random((series, 2, n))
+        data[:, 2:] = rng.standard_normal((series, 2, n))
+    else:
+        data = np.empty((series, 2, n))
+        data[:, 0] = np.arange(n)
+        if plotType == Renderer.TYPE_DATEPLOT:  # seconds since the epoch, one point per second
+            data[:, 0] += 1.5e9
+        # Random walks, kept positive for the log scale:
+        data[:, 1] = np.abs(np.cumsum(rng.standard_normal((series, n)), axis=-1)) + 1
+    return data[0] if series == 1 else data
+
+def draw(renderer):
+    """Render any pending updates and draw the canvas."""
+    renderer.__flush__()
+    renderer.canvas.draw()
+
+def timed(function):
+    """Get the time (s) taken to call `function`."""
+    t = time.perf_counter()
+    function()
+    return time.perf_counter() - t
+
+def runCase(plotType, data, kwargs):
+    """Time one renderer through construction, a replot, toggles, and a resize.
+
+    :returns: A `dict` of the times (s), and the memory held by the renderer ('nbytes')
+    """
+    result = {}
+    renderer = None
+
+    def construct():
+        nonlocal renderer
+        renderer = Renderer(data, plotType=plotType, **kwargs)
+        draw(renderer)
+    result['construct'] = timed(construct)
+
+    def replot():
+        renderer.__plot__()
+        draw(renderer)
+    result['replot'] = timed(replot)
+
+    def toggle(variable):
+        variable.set(not variable.get())
+        draw(renderer)
+    result['logY'] = timed(lambda: toggle(renderer.logY))
+    result['legend'] = timed(lambda: toggle(renderer.legend))
+
+    def resize():
+        renderer.fig.set_size_inches(*RESIZE)
+        renderer.__update__('layout', 'lod', 'view')
+        draw(renderer)
+    result['resize'] = timed(resize)
+
+    result['nbytes'] = renderer.nbytes
+    renderer.close()
+    return result
+
+def measureMemory(plotType, data, kwargs):
+    """Measure the memory allocated by constructing and drawing a renderer, which is done separately from the timed
+    runs since tracing allocations slows them down.
+
+    :returns: A `dict` of the memory (bytes) still allocated after construction ('allocated'), and the peak during it
+    ('peak')
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        renderer = Renderer(data, plotType=plotType, **kwargs)
+        draw(renderer)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    renderer.close()
+    return dict(allocated=current - before, peak=peak - before)
+
+def run(args):
+    """Run every case allowed by the command line arguments.
+
+    :returns: A list of results, one `dict` per case
+    """
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for name in args.types:
+        plotType = TYPES[name]
+        for series in ([1] if plotType in Renderer.GRID_TYPES else SERIES):
+            if series > args.max_series:
+                continue
+            slow = False
+            for points in SIZES:
+                if points > args.max_points or points < series:
+                    continue
+                case = dict(type=name, points=points, series=series)
+                # Once a case is too slow, larger ones are skipped:
+                if slow:
+                    case['skipped'] = True
+                    results.append(case)
+                    continue
+                data = makeData(plotType, points, series, rng)
+                kwargs = dict(copy=not args.no_copy, decimate=None if args.decimate == 'none' else args.decimate)
+                if plotType == Renderer.TYPE_ERRORBAR:
+                    kwargs['yerr'] = 0.1
+                # The best of the repeats is kept for each measurement:
+                for i in range(args.repeat):
+                    result = runCase(plotType, data, kwargs)
+                    for key in result:
+                        case[key] = min(case.get(key, result[key]), result[key])
+                case.update(measureMemory(plotType, data, kwargs))
+                del data
+                slow = case['construct'] + case['replot'] > args.max_seconds
+                results.append(case)
+                if not args.quiet:
+                    print('{type:>12} {points:>10} points {series:>5} series: construct {construct:8.3f} s, '
+                          'replot {replot:8.3f} s, logY {logY:8.3f} s, legend {legend:8.3f} s, resize {resize:8.3f} s, '
+                          '{nbytes:>12} bytes held, {allocated:>12} allocated, {peak:>12} peak'.format(**case))
+                    sys.stdout.flush()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark mplWindow rendering without a display.')
+    parser.add_argument('--types', type=lambda s: s.split(','), default=sorted(TYPES, key=TYPES.get),
+                        help='comma-separated plot types to run, of: ' + ', '.join(sorted(TYPES, key=TYPES.get)))
+    parser.add_argument('--max-points', type=lambda s: int(float(s)), default=10**6,
+                        help='largest total number of points to run, up to 1e8 [default=1e6]')
+    parser.add_argument('--max-series', type=int, default=1000, help='largest number of series to run [default=1000]')
+    parser.add_argument('--max-seconds', type=float, default=30,
+                        help='skip larger cases of a type once constructing and replotting takes longer [default=30]')
+    parser.add_argument('--repeat', type=int, default=3, help='times to run each case, the best is kept [default=3]')
+    parser.add_argument('--decimate', choices=['none', 'minmax', 'lttb'], default='minmax',
+                        help='decimation for plot and error bar series [default=minmax]')
+    parser.add_argument('--no-copy', action='store_true', help='view the data rather than copying it')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random data [default=0]')
+    parser.add_argument('--output', default='bench_output.txt', help='file to write the results to, as JSON')
+    parser.add_argument('--quiet', action='store_true', help="don't print each result")
+    args = parser.parse_args()
+    for name in args.types:
+        if name not in TYPES:
+            parser.error('unknown plot type: ' + name)
+
+    results = run(args)
+    with open(args.output, 'w') as f:
+        json.dump(dict(python=platform.python_version(), numpy=np.__version__, matplotlib=matplotlib.__version__,
+                       platform=platform.platform(), args=vars(args), results=results), f, indent=1)
+
+if __name__ == '__main__':
+    main()
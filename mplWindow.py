@@ -16,23 +16,109 @@
 
 __author__ = 'Alex Zylstra'
 
-import numpy as np
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-from matplotlib.backend_bases import key_press_handler
 import tkinter as tk
-from tkinter.messagebox import showinfo
-import tkinter.ttk as ttk
 import platform
+import collections
+import contextlib
+import importlib
+import json
+import time
+import os
+import pickle
+import queue
+import struct
+import tempfile
+import threading
+
+
+class _LazyModule(object):
+    """A module which is only imported when it is first used, so that importing `mplWindow` is fast, e.g. for tools
+    which only need the `Plot` constants. Once imported, the module replaces this in the module globals.
+
+    :param name: The name of the module to import
+    :param alias: The global name this is assigned to
+    :param submodules: (optional) Submodules to import along with it [default=()]
+    :param optional: (optional) If `True`, the global is set to `None` if the module can't be imported [default=False]
+    """
 
-matplotlib.rcParams['toolbar'] = 'None'
+    def __init__(self, name, alias, submodules=(), optional=False):
+        self.__dict__.update(name=name, alias=alias, submodules=submodules, optional=optional, module=None)
+
+    def __load__(self):
+        """Import the module, if it hasn't been already."""
+        if self.module is None:
+            try:
+                module = importlib.import_module(self.name)
+                for submodule in self.submodules:
+                    importlib.import_module(self.name + '.' + submodule)
+            except ImportError:
+                if not self.optional:
+                    raise
+                module = None
+            globals()[self.alias] = module
+            self.__dict__['module'] = module
+        return self.module
+
+    def __getattr__(self, attr):
+        return getattr(self.__load__(), attr)
+
+    def __bool__(self):
+        return self.__load__() is not None
+
+
+np = _LazyModule('numpy', 'np')
+matplotlib = _LazyModule('matplotlib', 'matplotlib',
+                         submodules=['artist', 'cm', 'collections', 'colors', 'container', 'dates', 'figure', 'image',
+                                     'lines', 'patches', 'quiver', 'ticker', 'backends.backend_agg'])
+plt = _LazyModule('matplotlib.pyplot', 'plt')
+ttk = _LazyModule('tkinter.ttk', 'ttk')
+messagebox = _LazyModule('tkinter.messagebox', 'messagebox')
+filedialog = _LazyModule('tkinter.filedialog', 'filedialog')
+futures = _LazyModule('concurrent.futures', 'futures')
+multiprocessing = _LazyModule('multiprocessing', 'multiprocessing')
+shared_memory = _LazyModule('multiprocessing.shared_memory', 'shared_memory')
+resource_tracker = _LazyModule('multiprocessing.resource_tracker', 'resource_tracker')
+contourpy = _LazyModule('contourpy', 'contourpy', optional=True)
+
+
+class Variable(object):
+    """A value which calls back when it is set, used for settings when there is no GUI. It has the same interface as
+    the Tk variables used by `Plot` windows.
+
+    :param value: The initial value
+    """
 
+    def __init__(self, value=None):
+        self.value = value
+        self.callbacks = []
 
-class Plot(tk.Toplevel):
-    """Implement a plot window, wrapping `matplotlib` with advanced GUI options that allow the user to change most aspects of the plot appearance.
+    def get(self):
+        """Get the value."""
+        return self.value
+
+    def set(self, value):
+        """Set the value, and call the callbacks."""
+        self.value = value
+        for callback in self.callbacks:
+            callback('', '', 'w')
+
+    def trace(self, mode, callback):
+        """Add a callback, called as `callback(name, index, mode)` when the value is set.
+
+        :param mode: The type of access to trace, only 'w' (writes) is supported
+        :param callback: The callback
+        """
+        self.callbacks.append(callback)
+
+
+class Renderer(object):
+    """Render plots without a GUI, drawing to an Agg canvas, e.g. for batch jobs on machines without a display. This
+    holds the data and the plotting and styling logic, which `Plot` windows add their GUI to.
 
-    :param data: The data to plot. Must be `numpy.ndarray`. The required shape varies based on plot type (see above).
+    :param data: The data to plot. Must be `numpy.ndarray`, or the path of a '.npy' file which is memory-mapped rather
+    than read. The required shape varies based on plot type (see above). Series with different numbers of points can be
+    passed as a `list` of arrays or a `RaggedArray`. Data in shared memory can be passed as a `SharedData`, or its name
+    as 'shm://name', which is viewed rather than copied and redrawn when it changes (see `sync`).
     :param plotType: The initial plot type to use.
     :param fmt: Matplotlib-style format strings to use for each series in the data. If left as `None`, default formatting is used. If 
     only one series is provided, `fmt` may be a `str`. If multiple series are provided, then `len(fmt) == len(data)` must be satisfied.
@@ -48,14 +134,21 @@ class Plot(tk.Toplevel):
     :param ylim: Limits for the y axis, must be a length-2 `tuple`, `list`, `np.ndarray`
     :param title: The plot title, must be a `str`
     :param titleSize: The font size to use for the plot title
-    :param windowTitle: The window title
+    :param logColor: Use a logarithmic color scale for 2-D histograms, images, color meshes, and contours
+    :param decimate: Reduce plot and error bar series with many points to only those needed at the current view and
+    canvas size, using either 'minmax' (the extremes in each pixel column) or 'lttb' (largest triangle three buckets).
+    If `None`, all points are drawn. Date plots with many points are always grouped into time buckets instead.
+    :param collection: Whether to draw plot and error bar series together as one `LineCollection`, which is much faster
+    for many series. Not possible with `fmt`, or with keyword args that only apply to individual lines (e.g. markers).
+    If `None`, it is used when there are at least `COLLECTION_MIN_SERIES` series.
+    :param copy: Whether to keep a copy of the data. If `False`, a read-only view of `data` is kept instead, so it must not
+    be modified afterwards. Memory-mapped data is never copied.
+    :param maxPoints: Maximum number of points to keep for each series when streaming data with `append` or `extend`,
+    older points are discarded. If `None`, the series grow without bound.
+    :param figsize: The figure size in inches, as `(width, height)`
+    :param dpi: The figure resolution
     :param kwargs: Any additional keyword args will be passed directly to the plot command.
-
-    :author: Alex Zylstra
-    :date: 2014-07-06
     """
-    __author__ = 'Alex Zylstra'
-    __version__ = '0.1'
 
     TYPE_PLOT = 0
     TYPE_ERRORBAR = 1
@@ -67,42 +160,174 @@ class Plot(tk.Toplevel):
     TYPE_COLORMESH = 7
     TYPE_DATEPLOT = 8
     TYPE_VECTOR = 9
+    # Bucket sizes for date plots, in milliseconds:
+    DATE_UNITS = [1, 2, 5, 10, 20, 50, 100, 200, 500,
+                  1000, 2000, 5000, 10000, 15000, 30000,
+                  60000, 120000, 300000, 600000, 900000, 1800000,
+                  3600000, 7200000, 10800000, 21600000, 43200000,
+                  86400000, 2*86400000, 7*86400000, 14*86400000, 30*86400000, 91*86400000, 365*86400000]
+    # Vector plots are drawn with about one arrow per this many pixels, chosen using a grid index of this size:
+    VECTOR_SPACING = 25
+    VECTOR_GRID = 512
+    # Types which show one 2-D grid rather than several series:
+    GRID_TYPES = [TYPE_CONTOUR, TYPE_IMAGE, TYPE_COLORMESH]
+
+    # Maximum number of layouts to remember:
+    LAYOUT_CACHE_SIZE = 64
+    # Series with fewer points than this are never decimated:
+    DECIMATE_MIN_POINTS = 10000
+    # Plot and error bar series are drawn as one collection when there are at least this many:
+    COLLECTION_MIN_SERIES = 50
+    # Keyword args which can be applied to a LineCollection, and their names for it:
+    COLLECTION_KWARGS = {'color': 'colors', 'c': 'colors', 'linewidth': 'linewidths', 'lw': 'linewidths',
+                         'linestyle': 'linestyles', 'ls': 'linestyles', 'alpha': 'alpha', 'zorder': 'zorder'}
+    # Histograms are computed from a base histogram with this many bins, when the number of bins divides it:
+    HIST_BASE_BINS = 6000
+    # Keyword args for histograms which need `Axes.hist` rather than the cached histogram engine:
+    HIST_UNSUPPORTED = ['bottom', 'align', 'rwidth', 'log', 'stacked']
+    # Number of bins along each axis of 2-D histograms:
+    HIST2D_BINS = 256
+    # Maximum number of 2-D histograms (e.g. for different views) to remember:
+    HIST2D_CACHE_SIZE = 8
+    # Number of recent renders to measure the rate of renders over, see `profile`:
+    STATS_RENDERS = 30
+    # Default resolution for saving the plot:
+    SAVE_DPI = 300
+    # Identifies session files, and the latest version of their format, see `saveSession`:
+    SESSION_FORMAT = 'mplWindow session'
+    SESSION_VERSION = 1
+    # Number of points to write at a time when saving data:
+    SAVE_CHUNK = 2**20
 
     def __init__(self, data, plotType=TYPE_PLOT, fmt=None, labels=None, 
         xlabel='', xlabelSize=12, ylabel='', ylabelSize=12,
         logX=False, logY=False, xlim=None, ylim=None,
         legend=False, legendLoc=1, legendFontSize=10,
-        title='', titleSize=14, windowTitle='mplWindow', **kwargs):
-        super(Plot, self).__init__()
-        self.title(windowTitle)
+        title='', titleSize=14, logColor=False, decimate=None, collection=None, copy=True, maxPoints=None,
+        figsize=(4,3), dpi=100, **kwargs):
+        # Pending updates, which are rendered together, see `__update__`:
+        self.dirty = set()
+        self.batchDepth = 0
+        # Cached layouts, see `__layout__`:
+        self.layoutCache = {}
+        # Timing of renders, see `profile`:
+        self.stats = None
+        self.statsCallback = None
+        self.stages = {}
+        # Resolution to choose the level of detail for, relative to the figure's, see `__resolution__`:
+        self.lodScale = 1.
+        self.renderTimes = collections.deque(maxlen=self.STATS_RENDERS)
+        # Retained artists for each series, and collections when series are drawn as collections (see
+        # `__makeCollections__`). These are replaced along with the data and caches, see `__clear__`:
+        self.artists = []
+        self.collections = []
+
+        # Data lines are only animated for blitting in windows, see `Plot`:
+        self.blit = False
+        self.figsize = figsize
+        self.dpi = dpi
+        self.fig = None
+        self.canvas = None
+        self.__initPlot__()
+        self.ax.callbacks.connect('xlim_changed', self.__viewChanged__)
+        self.ax.callbacks.connect('ylim_changed', self.__viewChanged__)
 
-        assert isinstance(data, np.ndarray)
+        Renderer.__reset__(self, data, plotType=plotType, fmt=fmt, labels=labels,
+                           xlabel=xlabel, xlabelSize=xlabelSize, ylabel=ylabel, ylabelSize=ylabelSize,
+                           logX=logX, logY=logY, xlim=xlim, ylim=ylim,
+                           legend=legend, legendLoc=legendLoc, legendFontSize=legendFontSize,
+                           title=title, titleSize=titleSize, logColor=logColor, decimate=decimate,
+                           collection=collection, copy=copy, maxPoints=maxPoints, **kwargs)
+
+        # Changes to the settings update the parts of the plot which depend on them:
+        self.plotTypeVar.trace('w', self.__plot__)
+        self.bins.trace('w', self.__rebin__)
+        self.levels.trace('w', self.__relevel__)
+        self.logX.trace('w', lambda *args: self.__update__('scale'))
+        self.logY.trace('w', lambda *args: self.__update__('scale'))
+        self.legend.trace('w', lambda *args: self.__update__('legend'))
+        self.legendLoc.trace('w', lambda *args: self.__update__('legend'))
+        self.legendFontSize.trace('w', lambda *args: self.__update__('legend'))
+        self.logColor.trace('w', lambda *args: self.__update__('norm'))
+        self.decimate.trace('w', lambda *args: self.__update__('lod'))
+
+    def __reset__(self, data, plotType=TYPE_PLOT, fmt=None, labels=None, 
+        xlabel='', xlabelSize=12, ylabel='', ylabelSize=12,
+        logX=False, logY=False, xlim=None, ylim=None,
+        legend=False, legendLoc=1, legendFontSize=10,
+        title='', titleSize=14, logColor=False, decimate=None, collection=None, copy=True, maxPoints=None, **kwargs):
+        """Replace the data and every setting, keeping the figure. Takes the same arguments as the constructor (apart
+        from the figure size and resolution)."""
+        if isinstance(data, str) and data.startswith(SharedData.PREFIX):
+            data = SharedData.attach(data[len(SharedData.PREFIX):])
+        elif isinstance(data, str):
+            data = np.load(data, mmap_mode='r')
+        # Series packed here are already a private copy, so they aren't copied again:
+        packed = isinstance(data, list) or isinstance(data, tuple)
+        if packed:
+            data = RaggedArray.fromList(data)
+        assert isinstance(data, np.ndarray) or isinstance(data, RaggedArray) or isinstance(data, SharedData)
+
+        # Remove anything drawn for previous data, and start again from the first color:
+        self.__clear__()
+        self.ax.set_prop_cycle(None)
 
         # store keyword args:
         self.kwargs = kwargs
-        # Store data:
-        self.data = np.copy(data)
+        self.__setting__('plotTypeVar', plotType)
+        # Histogram bins, `0` means the 'bins' keyword arg is used as is (e.g. an array of bin edges):
+        bins = 10
+        if isinstance(kwargs.get('bins'), int):
+            bins = kwargs.pop('bins')
+        elif 'bins' in kwargs:
+            bins = 0
+        self.__setting__('bins', bins)
+        self.hist2dRange = None
+        # Images and color meshes, see `__tile__`:
+        self.pyramidVersion = None
+        self.colorRange = None
+        self.tileShown = None
+        # Contour levels, `0` means the 'levels' keyword arg is used as is (e.g. a list of levels):
+        levels = 10
+        if isinstance(kwargs.get('levels'), int):
+            levels = kwargs.pop('levels')
+        elif 'levels' in kwargs:
+            levels = 0
+        self.__setting__('levels', levels)
+        self.contourPending = set()
+        # Date plots, see `__dates__` and `__dateView__`:
+        self.dateShown = {}
+        # Vector plots, see `__vectorIndex__` and `__vectorView__`:
+        self.vectorShown = {}
+        # Store data, shared data is viewed rather than copied:
+        self.copy = copy
+        self.shared = None
+        if isinstance(data, SharedData):
+            self.shared = data
+            self.sharedVersion = data.version
+            data = data.view()
+        self.data = data if packed or self.shared is not None else self.__store__(data)
+        # Drawing all of a memory-mapped array would read it into memory:
+        if decimate is None and (isinstance(data, np.memmap) or isinstance(getattr(data, 'buffer', None), np.memmap)):
+            decimate = 'minmax'
 
         # Format for each series:
         if isinstance(fmt, str):  # for one data series, fmt may be passed as a str
             fmt = [fmt]
-        if isinstance(fmt, list) or isinstance(fmt, tuple) and len(fmt) == self.data.shape[0]:
+        if isinstance(fmt, list) or isinstance(fmt, tuple) and len(fmt) == len(self.data):
             self.fmt = fmt
         else:
             self.fmt = None
 
         # Labels for each series:
         if labels is None:  # if nothing was passed, use some default ones:
-            if len(self.data.shape) == 2:
-                labels = 'Series 1'
-            else:
-                labels = []
-                for i in range(self.data.shape[0]):
-                    labels.append('Series ' + str(i+1))
+            labels = []
+            for i in range(self.__seriesCount__(plotType)):
+                labels.append('Series ' + str(i+1))
         if isinstance(labels, str):  # for one data series, label may be passed as a str
             labels = [labels]
         if isinstance(labels, list) or isinstance(labels, tuple):
-            self.labels = labels
+            self.labels = list(labels)
 
         # Labeling for the plot:
         self.xlabel = xlabel
@@ -115,178 +340,1915 @@ class Plot(tk.Toplevel):
         # Limits and scaling stuff:
         self.xlim = xlim
         self.ylim = ylim
-        self.logX = tk.BooleanVar()
-        self.logX.set(logX)
-        self.logX.trace('w', self.__plot__)
-        self.logY = tk.BooleanVar()
-        self.logY.set(logY)
-        self.logY.trace('w', self.__plot__)
+        self.__setting__('logX', bool(logX))
+        self.__setting__('logY', bool(logY))
 
         # Legend controls:
-        self.legend = tk.BooleanVar()
-        self.legend.set(legend)
-        self.legendLoc = tk.IntVar()
-        self.legendLoc.set(legendLoc)
-        self.legendFontSize = tk.IntVar()
-        self.legendFontSize.set(legendFontSize)
-        self.legend.trace('w', self.__plot__)
-        self.legendLoc.trace('w', self.__plot__)
-        self.legendFontSize.trace('w', self.__plot__)
+        self.__setting__('legend', bool(legend))
+        self.__setting__('legendLoc', legendLoc)
+        self.__setting__('legendFontSize', legendFontSize)
+
+        # When series are drawn as collections, the collections and the segments for each series, see `__makeCollections__`:
+        self.collection = collection
+        # Buffers for streamed series are bounded by this, see `extend`:
+        self.maxPoints = maxPoints
+        # Incremented whenever the data of a series changes, starting past the old data so that pending background
+        # work for it is discarded:
+        first = max(getattr(self, 'versions', {}).values(), default=-1) + 1
+        self.versions = {i: first for i in range(len(self.labels))}
+
+        # Color scale for 2-D data:
+        self.__setting__('logColor', bool(logColor))
+
+        # Level of detail for large series:
+        self.__setting__('decimate', decimate or 'none')
+        self.lodView = {}
+        self.sortedX = {}
 
-        self.menubar = None
-        self.fig = None
-        self.canvas = None
-        self.toolbar = None
-        self.frame = tk.Frame(self)
-        self.frame.pack()
+        self.__plot__()
 
-        self.__initPlot__()
-        self.__menubar__(plotType=plotType)
-        # add a key binding to close:
-        self.bind('<Escape>', self.__close__)
-        self.protocol("WM_DELETE_WINDOW", self.__close__)
-        self.protocol("WM_STATE_ZOOMED", self.__zoom__)
-        self.bind("<Configure>", self.__resize__)
+    def __setting__(self, name, value):
+        """Set the variable holding a setting, making it (see `__variable__`) if there isn't one yet.
 
-        self.__plot__()
+        :param name: The attribute name of the variable
+        :param value: The new value
+        """
+        if getattr(self, name, None) is None:
+            setattr(self, name, self.__variable__(value))
+        else:
+            getattr(self, name).set(value)
 
-    def __initPlot__(self):
-        """Initialization for the matplotlib infrastructure, e.g. setting up the figure and canvas."""
-        if plt.get_backend() != 'TkAgg':
-            plt.switch_backend('TkAgg')
+    def __variable__(self, value):
+        """Make a variable holding a setting, which can be traced for changes (see `Variable`).
 
-        if self.fig == None:
-            self.fig = matplotlib.pyplot.Figure(figsize=(4,3))
-            self.ax = self.fig.add_subplot(111)
-        
+        :param value: The initial value
+        """
+        return Variable(value)
 
-        if self.canvas is None:
-            self.canvas = matplotlib.backends.backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
-            self.canvas.show()
-            self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-           
-        self.frame.pack()
+    def __initPlot__(self):
+        """Initialization for the matplotlib infrastructure, i.e. the figure and an Agg canvas."""
+        self.fig = matplotlib.figure.Figure(figsize=self.figsize, dpi=self.dpi)
+        self.canvas = matplotlib.backends.backend_agg.FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
 
     def __plot__(self, *args):
-        """Generate the plot with current parameters."""
-        # clear whatever is there already:
-        self.ax.clear()
+        """Generate the plot with current parameters, rebuilding the artists for every series."""
+        self.__update__('data', 'scale', 'labels')
+
+    def __update__(self, *parts):
+        """Bring parts of the plot up to date with the current parameters. The update is deferred until the plot is
+        drawn or saved (see `__flush__`), so that several changes in a row are rendered together.
 
-        # Depending on the plot type requested, we need to do a few different things:
+        :param parts: The parts to update, any of 'data' (rebuild every series), 'scale', 'limits', 'autoscale',
+        'labels', 'legend', 'layout', 'lod' (decimation for the current view), 'view' (other artists which depend on
+        the current view), 'norm' (color scale), 'overlay', or 'toolbar'. An `int` updates only the data of that
+        series.
+        """
+        self.dirty |= set(parts)
+
+    def __flush__(self):
+        """Render any pending updates immediately."""
+        if len(self.dirty) > 0:
+            parts = self.dirty
+            self.dirty = set()
+            if self.stats is None:
+                self.__render__(parts)
+            else:
+                self.__profiled__(parts)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager to apply several changes with a single redraw, which happens when the block exits::
+
+            with plot.batch():
+                plot.logY.set(True)
+                plot.legend.set(True)
+                plot.setData(0, data)
+        """
+        self.batchDepth += 1
+        try:
+            yield self
+        finally:
+            self.batchDepth -= 1
+            if self.batchDepth == 0:
+                self.__flush__()
+
+    def __render__(self, parts):
+        """Apply the updates in `parts` (see `__update__`) to the existing artists.
+
+        :returns: The parts that were updated, or `None` if nothing visible changed
+        """
+        # Nothing is drawn after the data is released, e.g. when background work finishes after a window is closed:
+        if self.data is None:
+            return None
+        series = [x for x in parts if isinstance(x, int)]
+        if 'data' in parts:
+            with self.__stage__('data'):
+                self.__drawData__()
+            parts |= {'limits', 'legend', 'layout'}
+        elif len(series) > 0:
+            with self.__stage__('series'):
+                for i in series:
+                    if self.__drawSeries__(i):
+                        parts.add('legend')
+            parts.add('autoscale')
+        if 'data' not in parts and ('lod' in parts or 'view' in parts):
+            changed = []
+            if 'lod' in parts:
+                with self.__stage__('lod'):
+                    changed = [i for i in range(len(self.artists)) if i not in series and self.__lodChanged__(i)]
+                    for i in changed:
+                        if self.__drawSeries__(i):
+                            parts.add('legend')
+            if 'view' in parts and len(series) == 0:
+                with self.__stage__('view'):
+                    if self.__updateView__():
+                        changed.append(None)
+            # Most view changes are within what was already drawn, and need no redraw:
+            if len(changed) == 0 and parts <= {'lod', 'view'}:
+                return None
+
+        if 'scale' in parts:
+            with self.__stage__('scale'):
+                self.__applyScale__()
+            parts.add('layout')
+        if 'norm' in parts:
+            with self.__stage__('norm'):
+                self.__applyNorm__()
+        if 'limits' in parts:
+            with self.__stage__('limits'):
+                self.__applyLimits__()
+        elif 'autoscale' in parts:
+            with self.__stage__('limits'):
+                self.__relim__()
+                self.ax.autoscale_view()
+        if 'labels' in parts:
+            with self.__stage__('labels'):
+                self.__applyLabels__()
+            parts.add('layout')
+        if 'legend' in parts:
+            with self.__stage__('legend'):
+                self.__applyLegend__()
+        if 'layout' in parts:
+            with self.__stage__('layout'):
+                self.__layout__()
+        return parts
+
+    def profile(self, enabled=True, callback=None):
+        """Time each stage of rendering, and count the points drawn. The results of the latest render are kept in
+        `stats`, a `dict` with:
+
+            - 'renders': The number of renders timed
+            - 'render': The time (s) taken by the latest render
+            - 'stages': The time (s) taken by each stage of it, by name, e.g. 'data' (making the artists), 'legend',
+              'layout', or 'draw' (drawing the canvas, in windows)
+            - 'fps': The recent rate of renders (per second)
+            - 'points': The number of points drawn (line vertices, image pixels, etc)
+
+        :param enabled: (optional) `False` to stop timing, and set `stats` to `None` [default=True]
+        :param callback: (optional) Called as `callback(stats)` after each render
+        """
+        self.stats = {} if enabled else None
+        self.statsCallback = callback if enabled else None
+        self.renderTimes.clear()
+
+    @contextlib.contextmanager
+    def __stage__(self, name):
+        """Time a stage of rendering, if enabled (see `profile`)."""
+        if self.stats is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.) + time.perf_counter() - start
+
+    def __profiled__(self, parts):
+        """Render `parts` (see `__render__`), and record the times taken in `stats`."""
+        self.stages = {}
+        start = time.perf_counter()
+        parts = self.__render__(parts)
+        end = time.perf_counter()
+        if parts is None:
+            return
+        self.renderTimes.append(end)
+        fps = 0.
+        if len(self.renderTimes) > 1 and self.renderTimes[-1] > self.renderTimes[0]:
+            fps = (len(self.renderTimes) - 1) / (self.renderTimes[-1] - self.renderTimes[0])
+        self.stats = dict(renders=self.stats.get('renders', 0) + 1, render=end - start, stages=self.stages, fps=fps,
+                          points=self.__pointCount__(self.artists + [self.collections]))
+        if self.statsCallback is not None:
+            self.statsCallback(self.stats)
+
+    def __pointCount__(self, artists):
+        """Count the points drawn by some artists (or containers of artists): line vertices, image pixels, arrows, or
+        patches."""
+        count = 0
+        for a in artists:
+            if isinstance(a, list) or isinstance(a, tuple):  # including containers
+                count += self.__pointCount__(a)
+            elif isinstance(a, matplotlib.lines.Line2D):
+                count += len(a.get_xdata())
+            elif isinstance(a, matplotlib.quiver.Quiver):
+                count += a.N
+            elif isinstance(a, matplotlib.image.AxesImage) or isinstance(a, matplotlib.collections.QuadMesh):
+                count += np.size(a.get_array())
+            elif isinstance(a, matplotlib.collections.Collection):
+                count += sum(len(p.vertices) for p in a.get_paths())
+            elif isinstance(a, matplotlib.artist.Artist):
+                count += 1
+        return count
+
+    def __seriesCount__(self, plotType=None):
+        """Get the number of data series for a plot type.
+
+        :param plotType: (optional) The plot type to use [default=current type]
+        """
+        if plotType is None:
+            plotType = self.plotTypeVar.get()
+        if plotType in self.GRID_TYPES:
+            return 1
+        if isinstance(self.data, RaggedArray):
+            return len(self.data)
+        # Histograms take 1-D series, the other types have several rows per series:
+        dims = 1 if plotType == self.TYPE_HISTOGRAM else 2
+        if len(self.data.shape) <= dims:
+            return 1
+        return self.data.shape[0]
+
+    def __series__(self, i):
+        """Get the data for series `i` in the current plot type."""
+        if i in self.buffers:
+            data = self.buffers[i].view()
+            return data[0] if data.shape[0] == 1 else data
+        if i in self.seriesData:
+            return self.seriesData[i]
+        if isinstance(self.data, RaggedArray):
+            return self.data[i]
+        if self.plotTypeVar.get() in self.GRID_TYPES:
+            return self.data
+        dims = 1 if self.plotTypeVar.get() == self.TYPE_HISTOGRAM else 2
+        if len(self.data.shape) <= dims:
+            return self.data
+        return self.data[i]
+
+    def __streamState__(self, i):
+        """Record the state of series `i`, so that caches derived from it can later be updated with only the points
+        appended since (see `__appendedSince__`)."""
+        buffer = self.buffers.get(i)
+        return None if buffer is None else (buffer, buffer.dropped, buffer.dropped + len(buffer))
+
+    def __appendedSince__(self, i, state):
+        """Find the points appended to series `i` (see `extend`) since `state` was recorded by `__streamState__`.
+
+        :returns: The number of older points dropped from the front since, and the index of the first new point (which
+        is negative if every older point was dropped), or `None` if the series was changed other than by appending
+        """
+        buffer = self.buffers.get(i)
+        if state is None or buffer is not state[0]:
+            return None
+        return buffer.dropped - state[1], state[2] - buffer.dropped
+
+    def __drawData__(self):
+        """Remove the artists for every series and draw them again."""
+        for artists in self.artists:
+            self.__remove__(artists)
+        self.__remove__(self.collections)
+        self.artists = []
+        self.handles = []
+        self.collections = []
+        self.segments = None
+        self.errorSegments = None
+
+        if self.__collected__():
+            self.__makeCollections__()
+            return
+        for i in range(self.__seriesCount__()):
+            artists, handle = self.__makeSeries__(i)
+            self.artists.append(artists)
+            self.handles.append(handle)
+
+    def __drawSeries__(self, i):
+        """Update the artists for series `i` with its current data.
+
+        :returns: `True` if the artists had to be replaced, `False` if they were updated in place
+        """
+        if self.segments is not None:
+            self.__updateCollections__(i)
+            return False
         plotType = self.plotTypeVar.get()
-        # Standard plot
         if plotType == self.TYPE_PLOT:
-            assert self.data.shape[-2] == 2  # Check the shape of the data, for this type should be 2-D
+            data, index = self.__decimated__(i, self.__series__(i))
+            self.artists[i][0].set_data(data[0], data[1])
+            return False
+        if plotType == self.TYPE_2DHISTOGRAM:
+            self.__updateView__()
+            return False
+        if plotType == self.TYPE_CONTOUR and contourpy:
+            self.__contours__(self.artists[i][0])
+            return False
+        if plotType == self.TYPE_DATEPLOT:
+            self.__updateDates__(i, self.artists[i])
+            return False
 
-            # only one series of data
-            if len(self.data.shape) == 2:
-                if self.fmt is not None:
-                    self.ax.plot(self.data[0,:], self.data[1,:], self.fmt[0], label=self.labels[0], **self.kwargs)
-                else:
-                    self.ax.plot(self.data[0,:], self.data[1,:], label=self.labels[0], **self.kwargs)
+        # Other types don't support changing the data, so make a new one with the same color:
+        color = self.__color__(self.handles[i])
+        self.__remove__(self.artists[i])
+        self.artists[i], self.handles[i] = self.__makeSeries__(i, color=color)
+        return True
+
+    def __makeSeries__(self, i, color=None):
+        """Create the artists for series `i` in the current plot type.
 
-            # Loop over every series:
+        :param i: The series index
+        :param color: (optional) The color to use, if not specified by `fmt` or the keyword args [default=None]
+        :returns: A `list` of the artists that were created, and the artist to show in the legend
+        """
+        kwargs = dict(self.kwargs)
+        kwargs['label'] = self.labels[i]
+        if color is not None and self.fmt is None and 'color' not in kwargs:
+            kwargs['color'] = color
+
+        data = self.__series__(i)
+        plotType = self.plotTypeVar.get()
+        # Standard plot
+        if plotType == self.TYPE_PLOT:
+            assert data.shape[0] == 2  # Check the shape of the data, for this type should be 2-D
+            data, index = self.__decimated__(i, data)
+            if self.blit:
+                kwargs['animated'] = True
+            if self.fmt is not None:
+                lines = self.ax.plot(data[0], data[1], self.fmt[i], **kwargs)
             else:
-                for i in range(self.data.shape[0]):
-                    if self.fmt is not None:
-                        self.ax.plot(self.data[i, 0,:], self.data[i, 1,:], self.fmt[i], label=self.labels[i], **self.kwargs)
-                    else:
-                        self.ax.plot(self.data[i, 0,:], self.data[i, 1,:], label=self.labels[i], **self.kwargs)
+                lines = self.ax.plot(data[0], data[1], **kwargs)
+            return lines, lines[0]
 
         elif plotType == self.TYPE_ERRORBAR:
-            assert self.data.shape[-2] == 2  # Check the shape of the data, for this type should be 2-D
+            assert data.shape[0] == 2  # Check the shape of the data, for this type should be 2-D
+            n = data.shape[1]
+            data, index = self.__decimated__(i, data)
+            if index is not None:  # per-point errors need to be decimated too
+                for key in ['xerr', 'yerr']:
+                    err = kwargs.get(key)
+                    if isinstance(err, np.ndarray) and err.shape[-1] == n:
+                        kwargs[key] = err[..., index]
+            if self.fmt is not None:
+                kwargs['fmt'] = self.fmt[i]
+            container = self.ax.errorbar(data[0], data[1], **kwargs)
+            return [container], container
 
-            # only one series of data
-            if len(self.data.shape) == 2:
-                if self.fmt is not None:
-                    self.ax.errorbar(self.data[0,:], self.data[1,:], fmt=self.fmt[0], label=self.labels[0], **self.kwargs)
-                else:
-                    self.ax.errorbar(self.data[0,:], self.data[1,:], label=self.labels[0], **self.kwargs)
+        elif plotType == self.TYPE_BAR:
+            assert data.shape[0] == 2  # Check the shape of the data, for this type should be 2-D
+            container = self.ax.bar(data[0], data[1], **kwargs)
+            return [container], container
 
-            # Loop over every series:
+        elif plotType == self.TYPE_HISTOGRAM:
+            # data should be 1-D
+            assert len(data.shape) == 1
+            if (any(key in kwargs for key in self.HIST_UNSUPPORTED) or isinstance(kwargs.get('bins'), str)
+                    or kwargs.get('histtype') == 'barstacked' or not hasattr(self.ax, 'stairs')):
+                if self.bins.get() > 0:
+                    kwargs['bins'] = self.bins.get()
+                n, bins, patches = self.ax.hist(data, **kwargs)
+                return [patches], patches[0]
+
+            counts, edges = self.__histogram__(i, data)
+            for key in ['bins', 'range', 'weights', 'density', 'cumulative']:
+                kwargs.pop(key, None)
+            fill = kwargs.pop('histtype', 'bar') != 'step'
+            patch = self.ax.stairs(counts, edges, fill=fill, **kwargs)
+            return [patch], patch
+
+        elif plotType == self.TYPE_2DHISTOGRAM:
+            # All series are binned together:
+            if i > 0:
+                return [], None
+            counts, extent = self.__hist2d__()
+            self.hist2dShown = counts
+            kwargs.pop('label')
+            kwargs.pop('color', None)
+            kwargs.setdefault('aspect', 'auto')
+            kwargs.setdefault('interpolation', 'nearest')
+            image = self.ax.imshow(counts, origin='lower', extent=extent, norm=self.__norm__(), **kwargs)
+            return [image], None
+
+        elif plotType == self.TYPE_IMAGE or plotType == self.TYPE_COLORMESH:
+            level, region, visible = self.__tile__()
+            return [self.__makeTile__(level, region)], None
+
+        elif plotType == self.TYPE_CONTOUR:
+            return [self.__makeContour__()], None
+
+        elif plotType == self.TYPE_DATEPLOT:
+            assert data.shape[0] == 2  # Check the shape of the data, for this type should be 2-D
+            if self.fmt is not None:
+                lines = self.ax.plot([], [], self.fmt[i], **kwargs)
             else:
-                for i in range(self.data.shape[0]):
-                    if self.fmt is not None:
-                        self.ax.errorbar(self.data[0,:], self.data[1,:], fmt=self.fmt[i], label=self.labels[i], **self.kwargs)
-                    else:
-                        self.ax.errorbar(self.data[i,0,:], self.data[i,1,:], label=self.labels[i], **self.kwargs)
+                lines = self.ax.plot([], [], **kwargs)
+            self.__updateDates__(i, lines)
+            return lines, lines[0]
+
+        elif plotType == self.TYPE_VECTOR:
+            assert data.shape[0] == 4  # Check the shape of the data, for this type should be 4-D
+            self.vectorShown.pop(i, None)
+            key, index = self.__vectorView__(i)
+            self.vectorShown[i] = key
+            x, y, u, v = [np.asarray(data[row])[index] for row in range(4)]
+            # Quiver doesn't use the color cycle, so series would all be the same color:
+            if 'color' not in kwargs:
+                colors = matplotlib.rcParams['axes.prop_cycle'].by_key().get('color', ['k'])
+                kwargs['color'] = colors[i % len(colors)]
+            quiver = self.ax.quiver(x, y, u, v, **kwargs)
+            return [quiver], quiver
+
+        return [], None
+
+    def __pixels__(self):
+        """Get the size of the axes in pixels at the resolution being drawn (see `__resolution__`), at least 1."""
+        return max(self.ax.bbox.width * self.lodScale, 1), max(self.ax.bbox.height * self.lodScale, 1)
+
+    @contextlib.contextmanager
+    def __resolution__(self, dpi):
+        """Context manager to choose the level of detail (decimation, date buckets, arrows, image levels) for `dpi`
+        instead of the figure's resolution within the block, e.g. for saving. The artists are updated without drawing
+        the canvas, and restored when the block exits."""
+        self.__flush__()
+        self.lodScale = dpi / self.fig.dpi
+        try:
+            Renderer.__render__(self, {'lod', 'view'})
+            yield
+        finally:
+            self.lodScale = 1.
+            self.__update__('lod', 'view')
 
-        elif plotType == self.TYPE_BAR:
-            assert self.data.shape[-2] == 2  # Check the shape of the data, for this type should be 2-D
+    def __lodRange__(self):
+        """Get the x range and pixel width to decimate a series for, as a `tuple` `(xmin, xmax, span, width, log)`.
 
-            # only one series of data
-            if len(self.data.shape) == 2:
-                self.ax.bar(self.data[0,:], self.data[1,:], label=self.labels[0], **self.kwargs)
+        The range extends one view width beyond each side of the view, so that panning doesn't need a new decimation.
+        """
+        width = max(int(self.__pixels__()[0]), 1)
+        log = self.ax.get_xscale() == 'log'
+        if self.ax.get_autoscalex_on():
+            return -np.inf, np.inf, None, width, log
+
+        xmin, xmax = sorted(self.ax.get_xlim())
+        if log:
+            xmin, xmax = np.log10(max(xmin, 1e-300)), np.log10(max(xmax, 1e-300))
+        span = xmax - xmin
+        xmin, xmax = xmin - span, xmax + span
+        if log:
+            xmin, xmax = 10.**xmin, 10.**xmax
+        return xmin, xmax, span, width, log
+
+    def __lodChanged__(self, i):
+        """Check whether series `i` needs to be decimated again for the current view."""
+        method = self.decimate.get()
+        last = self.lodView.get(i)
+        if last is None:
+            return method != 'none' and self.plotTypeVar.get() in [self.TYPE_PLOT, self.TYPE_ERRORBAR]
+        if last[0] != method or last[1] != self.versions.get(i, 0):
+            return True
+        if method == 'none':
+            return False
 
-            # Loop over every series:
-            else:
-                for i in range(self.data.shape[0]):
-                    self.ax.bar(self.data[i,0,:], self.data[i,1,:], label=self.labels[i], **self.kwargs)
+        xmin, xmax, span, width, log = self.__lodRange__()
+        lastMin, lastMax, lastSpan, lastWidth, lastLog = last[2]
+        if width != lastWidth or log != lastLog or (span is None) != (lastSpan is None):
+            return True
+        if span is None:
+            return False
+        # Panning within the decimated range is fine, zooming is not:
+        viewMin, viewMax = sorted(self.ax.get_xlim())
+        return abs(span - lastSpan) > 1e-9 * abs(span) or viewMin < lastMin or viewMax > lastMax
 
-        elif plotType == self.TYPE_HISTOGRAM:
-            # data should be 1-D
-            if len(self.data.shape) == 1:
-                self.ax.hist(self.data, label=self.labels[0], **self.kwargs)
+    def __decimated__(self, i, data):
+        """Reduce series `i` to the points needed to draw it at the current view and canvas size.
 
+        :param i: The series index
+        :param data: The data for the series
+        :returns: The data to draw, and the indices of those points in `data` (`None` if all points are drawn)
+        """
+        method = self.decimate.get()
+        version = self.versions.get(i, 0)
+        lod = self.__lodRange__()
+        self.lodView[i] = (method, version, lod)
+        if method == 'none' or data.shape[1] < self.DECIMATE_MIN_POINTS:
+            return data, None
+
+        # The decimation needs sorted x values, which only has to be checked once per version of the data, and only
+        # for the new points if points were appended:
+        x = data[0]
+        last = self.sortedX.get(i)
+        if last is None or last[0] != version:
+            appended = None if last is None else self.__appendedSince__(i, last[2])
+            if appended is None or (not last[1] and appended[0] > 0):
+                isSorted = _isSorted(x)
+            else:
+                isSorted = last[1] and _isSorted(x[max(appended[1] - 1, 0):])
+            self.sortedX[i] = (version, isSorted, self.__streamState__(i))
+        if not self.sortedX[i][1]:
+            return data, None
+
+        xmin, xmax, span, width, log = lod
+        # When zoomed, the range is wider than the view, and has as many columns as pixels would cover it:
+        if span is not None:
+            low, high = (np.log10(xmin), np.log10(xmax)) if log else (xmin, xmax)
+            width = int(np.ceil(width * (high - low) / span))
+        if method == 'lttb':
+            index = lttbDecimate(x, data[1], xmin, xmax, width)
+        else:
+            # The extremes of blocks of points are kept for each version of the data, see `LinePyramid`:
+            if self.linePyramids.get(i, (None,))[0] != version:
+                self.linePyramids[i] = (version, LinePyramid(data[1]))
+            index = minMaxDecimate(x, data[1], xmin, xmax, width, log=log, pyramid=self.linePyramids[i][1])
+        if len(index) == data.shape[1]:
+            return data, None
+        return data[:, index], index
+
+    def __dates__(self, i):
+        """Get the times and values of date plot series `i`, sorted by time. The times (seconds since the epoch, or
+        `datetime64`) are converted to `int64` milliseconds once per version of the data.
+
+        :returns: The times, and the values
+        """
+        version = self.versions.get(i, 0)
+        if self.dateCache.get(i, (None,))[0] != version:
+            data = self.__series__(i)
+            x = np.asarray(data[0])
+            if np.issubdtype(x.dtype, np.datetime64):
+                t = x.astype('datetime64[ms]').view(np.int64)
             else:
-                assert len(self.data.shape) == 2
+                t = np.round(x * 1000.).astype(np.int64)
+            y = data[1]
+            if not _isSorted(t):
+                order = np.argsort(t, kind='stable')
+                t, y = t[order], np.asarray(y)[order]
+            self.dateCache[i] = (version, t, y)
+        return self.dateCache[i][1:]
+
+    def __dateView__(self, i):
+        """Choose the part of date plot series `i` to draw for the current view and canvas size, over the same range as
+        `__lodRange__`. When there are more points than pixels, they are grouped into buckets of a whole number of time
+        units (`DATE_UNITS`) about one pixel wide.
+
+        :returns: A key which changes when the points to draw do, the range of indices, and the bucket size (`None`
+        to draw every point)
+        """
+        t, y = self.__dates__(i)
+        width = max(int(self.__pixels__()[0]), 1)
+        if len(t) == 0:
+            return (self.versions.get(i, 0), width, None, 0, 0, None), (0, 0), None
+        if self.ax.get_autoscalex_on():
+            low, high, span = t[0], t[-1], None
+        else:
+            # Axis limits are in Matplotlib dates (days since an epoch):
+            epoch = np.datetime64(matplotlib.dates.get_epoch(), 'ms').astype(np.int64)
+            low, high = sorted(int(epoch + x * 86400000.) for x in self.ax.get_xlim())
+            span = high - low
+            low, high = low - span, high + span
+        a, b = int(np.searchsorted(t, low, 'left')), int(np.searchsorted(t, high, 'right'))
+        unit = None
+        if b - a > max(self.DECIMATE_MIN_POINTS, 2 * width):
+            perPixel = (t[b-1] - t[a] if span is None else span) / width
+            unit = next((u for u in self.DATE_UNITS if u >= perPixel), self.DATE_UNITS[-1])
+        key = (self.versions.get(i, 0), width, unit, low, high, span)
+        # Panning within the range that was drawn doesn't need it drawn again, zooming does:
+        shown = self.dateShown.get(i)
+        if span is not None and shown is not None and shown[5] is not None and shown[:3] == key[:3] \
+                and abs(shown[5] - span) <= 1e-9 * span + 1 and shown[3] <= low + span and high - span <= shown[4]:
+            key = shown
+        return key, (a, b), unit
+
+    def __updateDates__(self, i, artists):
+        """Draw the part of date plot series `i` for the current view. Buckets are drawn as a line through the mean
+        of each bucket, and a band between the minimum and maximum. Only the points drawn are converted to Matplotlib
+        dates.
+
+        :param i: The series index
+        :param artists: The `list` of artists for the series, starting with its line, which is updated in place
+        """
+        key, (a, b), unit = self.__dateView__(i)
+        self.dateShown[i] = key
+        t, y = self.__dates__(i)
+        t, y = t[a:b], y[a:b]
+        line = artists[0]
+        self.__remove__(artists[1:])
+        del artists[1:]
+        if unit is None:
+            line.set_data(matplotlib.dates.date2num(t.view('datetime64[ms]')), np.asarray(y))
+            return
 
-                for i in range(self.data.shape[0]):
-                    self.ax.hist(self.data[i,:], label=self.labels[i], **self.kwargs)
+        # Bucket edges are whole units since the epoch, and empty buckets are skipped:
+        edges = np.arange(t[0] // unit, t[-1] // unit + 1, dtype=np.int64) * unit
+        starts = np.unique(np.searchsorted(t, edges, 'left'))
+        starts = starts[starts < len(t)]
+        counts = np.diff(np.append(starts, len(t)))
+        mean = np.add.reduceat(y, starts, dtype=float) / counts
+        x = matplotlib.dates.date2num((t[starts] // unit * unit + unit // 2).view('datetime64[ms]'))
+        line.set_data(x, mean)
+        band = self.ax.fill_between(x, np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts),
+                                    color=line.get_color(), alpha=0.3, linewidth=0)
+        artists.append(band)
+
+    def __vectorIndex__(self, i):
+        """Get the grid index of vector series `i`, which is built once per version of the data. The data bounds are
+        divided into a `VECTOR_GRID` square grid, and the points are sorted by cell so that the points in any cell can
+        be found directly.
+
+        :returns: The data bounds `(xmin, xmax, ymin, ymax)`, the indices of the points sorted by cell, and the offset
+        of each cell in them (with one extra at the end)
+        """
+        version = self.versions.get(i, 0)
+        if self.vectorCache.get(i, (None,))[0] != version:
+            data = self.__series__(i)
+            x, y = np.asarray(data[0], dtype=float), np.asarray(data[1], dtype=float)
+            points = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+            x, y = x[points], y[points]
+            if len(points) > 0:
+                bounds = (x.min(), x.max(), y.min(), y.max())
+            else:
+                bounds = (0., 1., 0., 1.)
+            G = self.VECTOR_GRID
+            dx, dy = (bounds[1] - bounds[0]) / G or 1., (bounds[3] - bounds[2]) / G or 1.
+            ix = np.clip(((x - bounds[0]) / dx).astype(np.int64), 0, G - 1)
+            iy = np.clip(((y - bounds[2]) / dy).astype(np.int64), 0, G - 1)
+            cells = iy * G + ix
+            order = points[np.argsort(cells, kind='stable')]
+            offsets = np.zeros(G * G + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(cells, minlength=G * G))
+            self.vectorCache[i] = (version, bounds, order, offsets)
+        return self.vectorCache[i][1:]
+
+    def __vectorView__(self, i):
+        """Choose the arrows of vector series `i` to draw for the current view and canvas size, about one per
+        `VECTOR_SPACING` pixels in each direction. The view is divided into cells of that size (aligned to the data
+        bounds, so that panning keeps the same arrows), and the point nearest the center of each cell in the grid index
+        is chosen. The range extends past the view in both directions, as for `__lodRange__`.
+
+        :returns: A key which changes when the arrows to draw do, and the indices of the arrows
+        """
+        (x0, x1, y0, y1), order, offsets = self.__vectorIndex__(i)
+        width, height = self.__pixels__()
+        if self.ax.get_autoscalex_on() or self.ax.get_autoscaley_on():
+            view = (x0, x1, y0, y1)
+        else:
+            view = tuple(sorted(self.ax.get_xlim())) + tuple(sorted(self.ax.get_ylim()))
+        spanX, spanY = view[1] - view[0] or 1., view[3] - view[2] or 1.
+        # The size of one arrow's cell in data units:
+        sx, sy = spanX * self.VECTOR_SPACING / width, spanY * self.VECTOR_SPACING / height
+        key = (self.versions.get(i, 0), sx, sy, view[0] - spanX, view[1] + spanX, view[2] - spanY, view[3] + spanY)
+        shown = self.vectorShown.get(i)
+        if shown is not None and shown[0] == key[0] and abs(shown[1] - sx) <= 1e-9 * sx and \
+                abs(shown[2] - sy) <= 1e-9 * sy and shown[3] <= view[0] and view[1] <= shown[4] and \
+                shown[5] <= view[2] and view[3] <= shown[6]:
+            return shown, None
+        low, high, bottom, top = key[3:]
+
+        # The grid index cells which overlap the range:
+        G = self.VECTOR_GRID
+        dx, dy = (x1 - x0) / G or 1., (y1 - y0) / G or 1.
+        i0, i1 = [int(np.clip(np.floor((x - x0) / dx), 0, G - 1)) for x in [low, high]]
+        j0, j1 = [int(np.clip(np.floor((y - y0) / dy), 0, G - 1)) for y in [bottom, top]]
+        ii, jj = np.meshgrid(np.arange(i0, i1 + 1), np.arange(j0, j1 + 1))
+        cells = (jj * G + ii).reshape(-1)
+        counts = offsets[cells + 1] - offsets[cells]
+        cells, counts = cells[counts > 0], counts[counts > 0]
+
+        if counts.sum() <= (high - low) / sx * (top - bottom) / sy:
+            # Few enough to draw every point in the range:
+            starts = np.repeat(offsets[cells] - np.cumsum(counts) + counts, counts)
+            index = order[starts + np.arange(len(starts))]
+        else:
+            # One cell of the index per arrow, the one nearest the center of the arrow's cell:
+            cx, cy = x0 + (cells % G + 0.5) * dx, y0 + (cells // G + 0.5) * dy
+            kx, ky = np.floor((cx - x0) / sx), np.floor((cy - y0) / sy)
+            distance = (cx - x0 - (kx + 0.5) * sx)**2 / sx**2 + (cy - y0 - (ky + 0.5) * sy)**2 / sy**2
+            arrow = (ky - ky.min()) * (kx.max() - kx.min() + 1) + (kx - kx.min())
+            nearest = np.lexsort((distance, arrow))
+            first = np.ones(len(nearest), dtype=bool)
+            first[1:] = arrow[nearest][1:] != arrow[nearest][:-1]
+            index = order[offsets[cells[nearest[first]]]]
+        index = np.sort(index)
+        return key, index
+
+    def __viewChanged__(self, ax):
+        """Handle changes to the view, e.g. from the toolbar or new limits."""
+        if self.decimate.get() != 'none':
+            self.__update__('lod')
+        if self.plotTypeVar.get() in [self.TYPE_2DHISTOGRAM, self.TYPE_IMAGE, self.TYPE_COLORMESH, self.TYPE_DATEPLOT,
+                                      self.TYPE_VECTOR]:
+            self.__update__('view')
+
+    def __updateView__(self):
+        """Update artists which depend on the current view, other than decimated lines.
+
+        :returns: `True` if anything changed
+        """
+        if self.plotTypeVar.get() == self.TYPE_2DHISTOGRAM and len(self.artists) > 0:
+            image = self.artists[0][0]
+            counts, extent = self.__hist2d__()
+            if counts is self.hist2dShown:
+                return False
+            self.hist2dShown = counts
+            image.set_data(counts)
+            image.set_extent(extent)
+            image.autoscale()
+            return True
 
-        # TYPE_2DHISTOGRAM
-        # TYPE_CONTOUR
-        # TYPE_IMAGE
-        # TYPE_COLORMESH
-        # TYPE_DATEPLOT
-        # TYPE_VECTOR aka quiver
+        if self.plotTypeVar.get() == self.TYPE_VECTOR:
+            changed = False
+            for i in range(len(self.artists)):
+                if self.__vectorView__(i)[0] != self.vectorShown.get(i):
+                    self.__drawSeries__(i)
+                    changed = True
+            return changed
+
+        if self.plotTypeVar.get() == self.TYPE_DATEPLOT:
+            changed = False
+            for i in range(len(self.artists)):
+                if self.__dateView__(i)[0] != self.dateShown.get(i):
+                    self.__updateDates__(i, self.artists[i])
+                    changed = True
+            return changed
+
+        if self.plotTypeVar.get() in [self.TYPE_IMAGE, self.TYPE_COLORMESH] and len(self.artists) > 0:
+            level, region, visible = self.__tile__()
+            # Only a new level, or a view outside the region that was drawn, needs a new tile:
+            shown = self.tileShown
+            if (level == shown[0] and shown[1][0] <= visible[0] and visible[1] <= shown[1][1]
+                    and shown[1][2] <= visible[2] and visible[3] <= shown[1][3]):
+                return False
+            if self.plotTypeVar.get() == self.TYPE_IMAGE:
+                image = self.artists[0][0]
+                tile, extent = self.__imageTile__(level, region)
+                image.set_data(tile)
+                image.set_extent(extent)
+                self.tileShown = (level, region)
+            else:
+                self.__remove__(self.artists[0])
+                self.artists[0] = [self.__makeTile__(level, region)]
+            return True
+        return False
 
-        # Configure the axis scales
-        if self.xlim is not None:
-            self.ax.set_xlim(self.xlim[0], self.xlim[1])
-        if self.ylim is not None:
-            self.ax.set_ylim(self.ylim[0], self.ylim[1])
-        if self.logX.get():
+    def __collected__(self):
+        """Check whether the series should be drawn as collections, see `__makeCollections__`."""
+        if self.plotTypeVar.get() not in [self.TYPE_PLOT, self.TYPE_ERRORBAR] or self.collection is False:
+            return False
+        # The series must all look the same apart from color:
+        errors = ['xerr', 'yerr'] if self.plotTypeVar.get() == self.TYPE_ERRORBAR else []
+        if self.fmt is not None or any(key not in self.COLLECTION_KWARGS and key not in errors for key in self.kwargs):
+            return False
+        return self.collection is True or self.__seriesCount__() >= self.COLLECTION_MIN_SERIES
+
+    def __makeCollections__(self):
+        """Draw every series as a segment of one `LineCollection`, and the error bars of every series as another,
+        which avoids the overhead of one artist per series. Proxy artists represent the series in the legend."""
+        n = self.__seriesCount__()
+        props = {}
+        for key in self.kwargs:
+            if key in self.COLLECTION_KWARGS:
+                props[self.COLLECTION_KWARGS[key]] = self.kwargs[key]
+        colors = props.pop('colors', None)
+        if colors is not None:
+            self.colors = [colors] * n
+        else:
+            cycle = matplotlib.rcParams['axes.prop_cycle'].by_key().get('color', ['k'])
+            self.colors = [cycle[i % len(cycle)] for i in range(n)]
+
+        self.segments = []
+        self.errorSegments = []
+        for i in range(n):
+            segment, errors = self.__segments__(i)
+            self.segments.append(segment)
+            self.errorSegments.append(errors)
+        lines = matplotlib.collections.LineCollection(self.segments, colors=self.colors, animated=self.blit, **props)
+        self.ax.add_collection(lines)
+        self.collections = [lines]
+        if self.plotTypeVar.get() == self.TYPE_ERRORBAR:
+            bars = matplotlib.collections.LineCollection(np.concatenate(self.errorSegments), animated=self.blit, **props)
+            self.__colorErrors__(bars)
+            self.ax.add_collection(bars)
+            self.collections.append(bars)
+
+        for i in range(n):
+            self.artists.append([])
+            self.handles.append(matplotlib.lines.Line2D([], [], color=self.colors[i], label=self.labels[i],
+                                                        linewidth=props.get('linewidths'),
+                                                        linestyle=props.get('linestyles', '-'),
+                                                        alpha=props.get('alpha')))
+
+    def __segments__(self, i):
+        """Get the line segment for series `i`, with shape `(points, 2)`, and its error bar segments, with shape
+        `(bars, 2, 2)`."""
+        data = self.__series__(i)
+        n = data.shape[1]
+        data, index = self.__decimated__(i, data)
+        x, y = data[0], data[1]
+
+        errors = [np.zeros((0, 2, 2))]
+        for key in ['xerr', 'yerr']:
+            if key not in self.kwargs or self.plotTypeVar.get() != self.TYPE_ERRORBAR:
+                continue
+            err = np.asarray(self.kwargs[key])
+            if index is not None and len(err.shape) > 0 and err.shape[-1] == n:
+                err = err[..., index]
+            low, high = (err[0], err[1]) if len(err.shape) == 2 else (err, err)
+            if key == 'xerr':
+                start = np.broadcast_arrays(x - low, y)
+                end = np.broadcast_arrays(x + high, y)
+            else:
+                start = np.broadcast_arrays(x, y - low)
+                end = np.broadcast_arrays(x, y + high)
+            errors.append(np.stack([np.stack(start, axis=-1), np.stack(end, axis=-1)], axis=1))
+        return np.transpose(data[:2]), np.concatenate(errors)
+
+    def __colorErrors__(self, bars):
+        """Color the error bars in a collection to match their series."""
+        colors = []
+        for i in range(len(self.errorSegments)):
+            colors += [self.colors[i]] * len(self.errorSegments[i])
+        bars.set_color(colors)
+
+    def __updateCollections__(self, i):
+        """Update the collections with the current data of series `i`."""
+        self.segments[i], self.errorSegments[i] = self.__segments__(i)
+        self.collections[0].set_segments(self.segments)
+        if len(self.collections) > 1:
+            self.collections[1].set_segments(np.concatenate(self.errorSegments))
+            self.__colorErrors__(self.collections[1])
+
+    def __remove__(self, artists):
+        """Remove a collection of artists (or containers of artists) from the plot."""
+        for a in artists:
+            if isinstance(a, list) or (isinstance(a, tuple) and not hasattr(a, 'remove')):
+                self.__remove__(a)
+            else:
+                a.remove()
+
+    def __color__(self, handle):
+        """Get the color used to draw a series, given its legend handle."""
+        if handle is None:
+            return None
+        if isinstance(handle, matplotlib.container.Container):
+            handle = handle[0] if len(handle) > 0 else None
+            return self.__color__(handle)
+        if isinstance(handle, matplotlib.lines.Line2D):
+            return handle.get_color()
+        if isinstance(handle, matplotlib.patches.Patch):
+            return handle.get_facecolor() if handle.get_fill() else handle.get_edgecolor()
+        if isinstance(handle, matplotlib.collections.Collection) and len(handle.get_facecolor()) == 1:
+            return handle.get_facecolor()[0]
+        return None
+
+    def __histogram__(self, i, data):
+        """Get the histogram for series `i`, which is cached until its data changes. Histograms with a number of bins
+        that divides `HIST_BASE_BINS` are summed from a cached base histogram, so changing the bins is cheap.
+
+        :param i: The series index
+        :param data: The data for the series
+        :returns: The counts (or densities) and the bin edges
+        """
+        version = self.versions.get(i, 0)
+        cache = self.histCache.get(i)
+        if cache is not None and cache['version'] != version:
+            cache = self.__extendHistogram__(i, cache, data)
+        if cache is None:
+            # The counts by key, and the bins and range they were counted with:
+            cache = {'version': version, 'stream': self.__streamState__(i), 'counts': {}, 'bins': {}}
+            self.histCache[i] = cache
+
+        weights = self.kwargs.get('weights')
+        bins = self.bins.get()
+        binRange = self.kwargs.get('range')
+        if binRange is None:
+            if 'range' not in cache:
+                cache['range'] = histogramRange(data)
+            binRange = cache['range']
+        binRange = (float(binRange[0]), float(binRange[1]))
+
+        if bins == 0:
+            edges = np.asarray(self.kwargs['bins'], dtype=float)
+            key = tuple(edges)
+            args = (edges, None)
+        else:
+            edges = np.linspace(binRange[0], binRange[1], bins + 1)
+            if self.HIST_BASE_BINS % bins == 0:
+                key = ('base', binRange)
+                args = (self.HIST_BASE_BINS, binRange)
+            else:
+                key = (bins, binRange)
+                args = (bins, binRange)
+        if key not in cache['counts']:
+            cache['counts'][key] = histogram(data, args[0], args[1], weights=weights)
+            cache['bins'][key] = args
+        counts = cache['counts'][key]
+        if key[0] == 'base':
+            counts = counts.reshape((bins, -1)).sum(axis=1)
+
+        # Normalization is the same as `Axes.hist`:
+        if self.kwargs.get('density'):
+            counts = counts / (counts.sum() * np.diff(edges))
+            if self.kwargs.get('cumulative'):
+                counts = np.cumsum(counts * np.diff(edges))
+        elif self.kwargs.get('cumulative'):
+            counts = np.cumsum(counts)
+        return counts, edges
+
+    def __extendHistogram__(self, i, cache, data):
+        """Update the cached histograms of series `i` (see `__histogram__`) by counting only the points appended since
+        they were counted, if the bins are the same.
+
+        :returns: The updated cache, or `None` if the histograms need to be counted again, e.g. if points were dropped
+        or the new points are outside the range of the bins
+        """
+        appended = self.__appendedSince__(i, cache['stream'])
+        if appended is None or appended[0] > 0 or self.kwargs.get('weights') is not None:
+            return None
+        new = np.asarray(data[appended[1]:])
+        if 'range' in cache:
+            finite = new[np.isfinite(new)]
+            if len(finite) > 0 and (finite.min() < cache['range'][0] or finite.max() > cache['range'][1]):
+                return None
+        for key, (bins, binRange) in cache['bins'].items():
+            cache['counts'][key] = cache['counts'][key] + histogram(new, bins, binRange)
+        cache['version'] = self.versions.get(i, 0)
+        cache['stream'] = self.__streamState__(i)
+        return cache
+
+    def __rebin__(self, *args):
+        """Handle changes to the number of histogram bins."""
+        # There's no data while a reused window is being reset, see `__reset__`:
+        if self.data is not None and self.plotTypeVar.get() == self.TYPE_HISTOGRAM:
+            self.__update__(*range(self.__seriesCount__()))
+
+    def __applyScale__(self):
+        """Configure the axis scales."""
+        if self.logX.get() and self.plotTypeVar.get() != self.TYPE_DATEPLOT:
             self.ax.set_xscale('log')
         else:
             self.ax.set_xscale('linear')
+        if self.plotTypeVar.get() == self.TYPE_DATEPLOT:
+            self.ax.xaxis_date()
         if self.logY.get():
             self.ax.set_yscale('log')
         else:
             self.ax.set_yscale('linear')
 
-        # Configure the labels
-        if self.xlabel != '' and self.xlabel is not None:
-            self.ax.set_xlabel(self.xlabel, fontsize=self.xlabelSize)
-        if self.ylabel != '' and self.ylabel is not None:
-            self.ax.set_ylabel(self.ylabel, fontsize=self.ylabelSize)
-        if self.title != '' and self.title is not None:
-            self.ax.set_title(self.title, fontsize=self.titleSize)
+    def __norm__(self):
+        """Get the color normalization to use for 2-D data, with limits from the 'vmin' and 'vmax' keyword args or
+        the range of the grid data (`colorRange`) if known. Otherwise, the limits are set from the data being drawn."""
+        vmin = self.kwargs.get('vmin')
+        vmax = self.kwargs.get('vmax')
+        # The range of the grid values is kept when the plot type changes, but other types (e.g. 2-D histograms) have
+        # their own range:
+        if self.colorRange is not None and self.plotTypeVar.get() in self.GRID_TYPES:
+            vmin = self.colorRange[0] if vmin is None else vmin
+            vmax = self.colorRange[1] if vmax is None else vmax
+        if self.logColor.get():
+            if vmin is not None and vmax is not None and vmin <= 0 < vmax:
+                vmin = vmax * 1e-6
+            return matplotlib.colors.LogNorm(vmin=vmin, vmax=vmax)
+        return matplotlib.colors.Normalize(vmin=vmin, vmax=vmax)
+
+    def __applyNorm__(self):
+        """Configure the color scale of 2-D data."""
+        for artists in self.artists:
+            for a in artists:
+                if isinstance(a, matplotlib.cm.ScalarMappable):
+                    a.set_norm(self.__norm__())
+
+    def __pyramid__(self, name):
+        """Get the image pyramid for part of the grid data, which is built lazily and kept until the data changes.
+
+        :param name: Which part of the data, either 'C' (the values), 'X', or 'Y' (the coordinates, if given)
+        """
+        version = self.versions.get(0, 0)
+        if self.pyramidVersion != version:
+            self.pyramids = {}
+            self.pyramidVersion = version
+            self.colorRange = None
+        if name not in self.pyramids:
+            data = self.__series__(0)
+            # Grids are either just the values, or the X, Y, and values:
+            grid = len(data.shape) == 3 and data.shape[0] == 3 and data.shape[-1] not in [3, 4]
+            if name == 'C':
+                self.pyramids[name] = ImagePyramid(data[2] if grid else data)
+            elif grid:
+                self.pyramids[name] = ImagePyramid(data[0] if name == 'X' else data[1])
+            else:
+                return None
+        return self.pyramids[name]
+
+    def __colorRange__(self):
+        """Get the range of the (full resolution) grid values, which is computed once per version of the data."""
+        pyramid = self.__pyramid__('C')
+        if self.colorRange is None:
+            self.colorRange = histogramRange(pyramid.level(0).reshape(-1))
+        return self.colorRange
+
+    def __contourLevels__(self):
+        """Get the contour levels to draw, either those in the 'levels' keyword arg or about `levels` evenly spaced
+        levels within the range of the data."""
+        if self.levels.get() == 0:
+            return [float(x) for x in np.atleast_1d(self.kwargs['levels'])]
+        low, high = self.__colorRange__()
+        levels = matplotlib.ticker.MaxNLocator(self.levels.get() + 1).tick_values(low, high)
+        return [float(x) for x in levels if low <= x <= high]
+
+    def __contourGrid__(self):
+        """Get the coordinates and values of the grid to contour."""
+        X, Y = self.__pyramid__('X'), self.__pyramid__('Y')
+        z = self.__pyramid__('C').level(0)
+        if X is None:
+            return np.arange(z.shape[1]), np.arange(z.shape[0]), z
+        return X.level(0), Y.level(0), z
+
+    def __makeContour__(self):
+        """Draw contours of the grid data. The contour lines are computed in the background (see `__contours__`),
+        unless contourpy is not available.
+
+        :returns: The new artist
+        """
+        if not contourpy:
+            kwargs = dict(self.kwargs)
+            kwargs.pop('levels', None)
+            x, y, z = self.__contourGrid__()
+            return self.ax.contour(x, y, z, levels=self.__contourLevels__(), norm=self.__norm__(), **kwargs)
+
+        kwargs = {key: self.kwargs[key] for key in ['cmap', 'linewidths', 'linestyles', 'alpha'] if key in self.kwargs}
+        self.__colorRange__()
+        collection = matplotlib.collections.LineCollection([], norm=self.__norm__(), **kwargs)
+        collection.set_array(np.zeros(0))
+        self.ax.add_collection(collection)
+        self.__contours__(collection)
+        return collection
+
+    def __contours__(self, collection):
+        """Show the contour lines for the current data and levels. Lines are cached per version of the data and level,
+        so changing the levels only computes the new ones. Missing levels are computed in a worker thread, and shown
+        when they are done; until then the lines that are already known are shown.
+
+        :param collection: The `LineCollection` to show the lines in
+        """
+        version = self.versions.get(0, 0)
+        for key in list(self.contourCache.keys()):
+            if key[0] != version:
+                del self.contourCache[key]
+        levels = self.__contourLevels__()
+        missing = [level for level in levels if (version, level) not in self.contourCache
+                   and (version, level) not in self.contourPending]
+        if len(missing) > 0:
+            x, y, z = self.__contourGrid__()
+
+            def work(progress):
+                generator = contourpy.contour_generator(x, y, z, line_type=contourpy.LineType.Separate)
+                lines = {}
+                for j, level in enumerate(missing):
+                    lines[level] = generator.lines(level)
+                    progress((j + 1) / len(missing))
+                return lines
+
+            def done(lines, error):
+                self.contourPending.difference_update((version, level) for level in missing)
+                if error is not None:
+                    self.__error__('Contours', error)
+                elif version == self.versions.get(0, 0):
+                    self.contourCache.update(((version, level), lines[level]) for level in missing)
+                    if self.plotTypeVar.get() == self.TYPE_CONTOUR:
+                        self.__update__(0)
+
+            self.contourPending.update((version, level) for level in missing)
+            self.__background__(work, 'Contours', done)
+
+        known = [level for level in levels if (version, level) in self.contourCache]
+        # Keep showing the lines of old data until any of the new ones are known:
+        if len(known) == 0 and len(collection.get_segments()) > 0 and len(missing) > 0:
+            return
+        segments, values = [], []
+        for level in known:
+            lines = self.contourCache[(version, level)]
+            segments.extend(lines)
+            values.extend([level] * len(lines))
+        collection.set_segments(segments)
+        collection.set_array(np.asarray(values, dtype=float))
+
+    def __relevel__(self, *args):
+        """Handle changes to the number of contour levels."""
+        if self.data is not None and self.plotTypeVar.get() == self.TYPE_CONTOUR:
+            self.__update__(0)
+
+    def __imageExtent__(self):
+        """Get the extent of the whole image as `(left, right, bottom, top)`, and whether its origin is 'upper'."""
+        height, width = self.__pyramid__('C').shape[:2]
+        upper = self.kwargs.get('origin', matplotlib.rcParams['image.origin']) == 'upper'
+        extent = self.kwargs.get('extent')
+        if extent is None:
+            extent = (-0.5, width - 0.5, height - 0.5, -0.5) if upper else (-0.5, width - 0.5, -0.5, height - 0.5)
+        return extent, upper
+
+    def __tile__(self):
+        """Choose the pyramid level and region of an image or color mesh to draw for the current view and canvas size,
+        so that roughly one value is drawn per screen pixel.
+
+        :returns: The level, the region to draw as `(row0, row1, col0, col1)` in full-resolution indices (including a
+        margin around the view), and the visible region in the same form
+        """
+        pyramid = self.__pyramid__('C')
+        height, width = pyramid.shape[:2]
+        rows, cols = (0, height), (0, width)
+        if len(self.artists) > 0 and not (self.ax.get_autoscalex_on() and self.ax.get_autoscaley_on()):
+            x0, x1 = self.ax.get_xlim()
+            y0, y1 = self.ax.get_ylim()
+            if self.plotTypeVar.get() == self.TYPE_IMAGE:
+                (left, right, bottom, top), upper = self.__imageExtent__()
+                cols = sorted([(x - left) * width / (right - left) for x in [x0, x1]])
+                if upper:
+                    rows = sorted([(y - top) * height / (bottom - top) for y in [y0, y1]])
+                else:
+                    rows = sorted([(y - bottom) * height / (top - bottom) for y in [y0, y1]])
+            else:
+                X, Y = self.__pyramid__('X'), self.__pyramid__('Y')
+                xs = np.arange(width) if X is None else np.asarray(X.level(0)[0])
+                ys = np.arange(height) if Y is None else np.asarray(Y.level(0)[:, 0])
+                cols = _indexRange(xs, *sorted([x0, x1]))
+                rows = _indexRange(ys, *sorted([y0, y1]))
+        r0, r1 = min(max(rows[0], 0), height), min(max(rows[1], 0), height)
+        c0, c1 = min(max(cols[0], 0), width), min(max(cols[1], 0), width)
+
+        # The coarsest level with at least one value per screen pixel:
+        rowCount, colCount = max(r1 - r0, 1), max(c1 - c0, 1)
+        factor = max(colCount / self.__pixels__()[0], rowCount / self.__pixels__()[1])
+        level = min(int(np.floor(np.log2(factor))) if factor > 1 else 0, pyramid.maxLevel)
+        step = 2**level
+
+        # Add a margin of half the view on each side, aligned to the level:
+        rowMax, colMax = (height >> level) * step, (width >> level) * step
+        row0 = min(max(int(r0 - rowCount/2) // step * step, 0), rowMax - step)
+        row1 = max(min(int(np.ceil((r1 + rowCount/2) / step)) * step, rowMax), row0 + step)
+        col0 = min(max(int(c0 - colCount/2) // step * step, 0), colMax - step)
+        col1 = max(min(int(np.ceil((c1 + colCount/2) / step)) * step, colMax), col0 + step)
+        return level, (row0, row1, col0, col1), (r0, r1, c0, c1)
+
+    def __imageTile__(self, level, region):
+        """Get part of the image at one pyramid level.
+
+        :param level: The pyramid level
+        :param region: The region to get as `(row0, row1, col0, col1)` in full-resolution indices
+        :returns: The values, and the extent to draw them at
+        """
+        row0, row1, col0, col1 = region
+        step = 2**level
+        tile = self.__pyramid__('C').level(level)[row0//step:row1//step, col0//step:col1//step]
+        height, width = self.__pyramid__('C').shape[:2]
+        (left, right, bottom, top), upper = self.__imageExtent__()
+        x = lambda col: left + col * (right - left) / width
+        if upper:
+            y = lambda row: top + row * (bottom - top) / height
+            return tile, (x(col0), x(col1), y(row1), y(row0))
+        y = lambda row: bottom + row * (top - bottom) / height
+        return tile, (x(col0), x(col1), y(row0), y(row1))
+
+    def __makeTile__(self, level, region):
+        """Draw part of an image or color mesh at one pyramid level.
+
+        :param level: The pyramid level
+        :param region: The region to draw as `(row0, row1, col0, col1)` in full-resolution indices
+        :returns: The new artist
+        """
+        kwargs = dict(self.kwargs)
+        for key in ['vmin', 'vmax', 'extent', 'origin', 'label', 'color', 'levels']:
+            kwargs.pop(key, None)
+        pyramid = self.__pyramid__('C')
+        scalar = len(pyramid.shape) == 2
+        # The color scale is fixed by the range of the whole data, so it doesn't change with the view:
+        if scalar:
+            self.__colorRange__()
+            kwargs['norm'] = self.__norm__()
+        self.tileShown = (level, region)
+
+        if self.plotTypeVar.get() == self.TYPE_IMAGE:
+            tile, extent = self.__imageTile__(level, region)
+            (left, right, bottom, top), upper = self.__imageExtent__()
+            kwargs.setdefault('interpolation', 'nearest')
+            return self.ax.imshow(tile, extent=extent, origin='upper' if upper else 'lower', **kwargs)
+
+        row0, row1, col0, col1 = region
+        step = 2**level
+        tile = pyramid.level(level)[row0//step:row1//step, col0//step:col1//step]
+        X, Y = self.__pyramid__('X'), self.__pyramid__('Y')
+        if X is None:
+            # Coordinates are the indices, at the centers of each (averaged) cell:
+            x = col0 + (np.arange(tile.shape[1]) + 0.5) * step - 0.5
+            y = row0 + (np.arange(tile.shape[0]) + 0.5) * step - 0.5
+        else:
+            x = X.level(level)[row0//step:row1//step, col0//step:col1//step]
+            y = Y.level(level)[row0//step:row1//step, col0//step:col1//step]
+        kwargs.setdefault('shading', 'nearest')
+        return self.ax.pcolormesh(x, y, tile, **kwargs)
 
-        # Configure the legend:
+    def __hist2d__(self):
+        """Get the 2-D histogram of all series for the current view. Histograms are cached for the most recent views
+        until the data changes.
+
+        :returns: The counts, with shape `(ny, nx)`, and the extent of the histogram as `(xmin, xmax, ymin, ymax)`
+        """
+        n = self.__seriesCount__()
+        versions = tuple(self.versions.get(i, 0) for i in range(n))
+        # The full range of the data:
+        if self.hist2dRange is None or self.hist2dRange[0] != versions:
+            ranges = [(histogramRange(d[0]), histogramRange(d[1])) for d in map(self.__series__, range(n))]
+            xRange = (min(r[0][0] for r in ranges), max(r[0][1] for r in ranges))
+            yRange = (min(r[1][0] for r in ranges), max(r[1][1] for r in ranges))
+            self.hist2dRange = (versions, xRange, yRange)
+            self.hist2dCache = {}
+        versions, xRange, yRange = self.hist2dRange
+
+        # If zoomed in, only bin what is visible:
+        if len(self.artists) > 0 and not self.ax.get_autoscalex_on():
+            xRange = tuple(sorted(self.ax.get_xlim()))
+        if len(self.artists) > 0 and not self.ax.get_autoscaley_on():
+            yRange = tuple(sorted(self.ax.get_ylim()))
+
+        bins = self.HIST2D_BINS
+        key = (xRange, yRange, bins)
+        if key not in self.hist2dCache:
+            counts = np.zeros((bins, bins), dtype=np.int64)
+            for i in range(n):
+                data = self.__series__(i)
+                counts += histogram2d(data[0], data[1], (bins, bins), (xRange, yRange))
+            if len(self.hist2dCache) >= self.HIST2D_CACHE_SIZE:
+                self.hist2dCache.pop(next(iter(self.hist2dCache)))
+            self.hist2dCache[key] = counts
+        return self.hist2dCache[key], xRange + yRange
+
+    def __applyLimits__(self):
+        """Configure the axis limits to those requested, autoscaling any that are not set to the current data."""
+        self.__relim__()
+        if self.xlim is not None:
+            self.ax.set_xlim(self.xlim[0], self.xlim[1])
+        else:
+            self.ax.set_autoscalex_on(True)
+        if self.ylim is not None:
+            self.ax.set_ylim(self.ylim[0], self.ylim[1])
+        else:
+            self.ax.set_autoscaley_on(True)
+        self.ax.autoscale_view()
+
+    def __relim__(self):
+        """Recompute the data limits from the current artists."""
+        self.ax.relim()
+        # Color meshes aren't included by `relim`:
+        for artists in self.artists:
+            for a in artists:
+                if isinstance(a, matplotlib.collections.QuadMesh):
+                    self.ax.update_datalim(a.get_datalim(self.ax.transData).get_points())
+        # Contours cover the grid, even while the lines are still being computed:
+        if self.plotTypeVar.get() == self.TYPE_CONTOUR and len(self.artists) > 0:
+            x, y, z = self.__contourGrid__()
+            if len(x.shape) == 1:
+                x, y = np.meshgrid(x[[0, -1]], y[[0, -1]])
+            corners = (np.array([0, 0, -1, -1]), np.array([0, -1, 0, -1]))
+            self.ax.update_datalim(np.column_stack([x[corners], y[corners]]))
+
+    def __applyLabels__(self):
+        """Configure the axis labels and title."""
+        self.ax.set_xlabel(self.xlabel or '', fontsize=self.xlabelSize)
+        self.ax.set_ylabel(self.ylabel or '', fontsize=self.ylabelSize)
+        self.ax.set_title(self.title or '', fontsize=self.titleSize)
+
+    def __applyLegend__(self):
+        """Configure the legend, which is regenerated from the series handles rather than the whole plot."""
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
         if self.legend.get():
-            self.ax.legend(loc=self.legendLoc.get(), fontsize=self.legendFontSize.get())
+            handles = [h for h in self.handles if h is not None]
+            labels = [self.labels[i] for i in range(len(self.handles)) if self.handles[i] is not None]
+            self.ax.legend(handles, labels, loc=self.legendLoc.get(), fontsize=self.legendFontSize.get())
+
+    def __layout__(self):
+        """Make sure the layout is good, reusing the result of a previous layout if nothing relevant has changed."""
+        key = (tuple(self.fig.get_size_inches()), self.fig.dpi,
+               self.xlabel, self.xlabelSize, self.ylabel, self.ylabelSize, self.title, self.titleSize,
+               self.ax.get_xscale(), self.ax.get_yscale(), self.ax.get_xlim(), self.ax.get_ylim())
+        params = self.layoutCache.get(key)
+        if params is not None:
+            self.fig.subplots_adjust(**params)
+            return
+
+        try:
+            self.fig.tight_layout()
+        except ValueError as e:
+            return
+        p = self.fig.subplotpars
+        if len(self.layoutCache) >= self.LAYOUT_CACHE_SIZE:
+            self.layoutCache.pop(next(iter(self.layoutCache)))
+        self.layoutCache[key] = dict(left=p.left, right=p.right, bottom=p.bottom, top=p.top)
+
+    @property
+    def nbytes(self):
+        """The memory (in bytes) held by the data and the caches derived from it. Memory-mapped data isn't counted, as
+        it isn't held in memory, and memory shared by several arrays is only counted once."""
+        return _nbytes([self.data, self.seriesData, self.buffers, self.histCache, self.hist2dCache, self.pyramids,
+                        self.linePyramids, self.contourCache, self.dateCache, self.vectorCache])
+
+    def __clear__(self):
+        """Remove the artists, and release the data and caches, keeping the figure (see `__reset__`)."""
+        for artists in self.artists:
+            self.__remove__(artists)
+        self.__remove__(self.collections)
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        self.artists = []
+        # The artist representing each series in the legend, and the segments for each series when drawn as collections:
+        self.handles = []
+        self.collections = []
+        self.segments = None
+        self.errorSegments = None
+        self.data = None
+        # Replacement data for individual series, see `setData`, and buffers for streamed series, see `extend`:
+        self.seriesData = {}
+        self.buffers = {}
+        # Caches derived from the data:
+        self.histCache = {}
+        self.hist2dCache = {}
+        self.hist2dShown = None
+        self.pyramids = {}
+        self.linePyramids = {}
+        self.contourCache = {}
+        self.dateCache = {}
+        self.vectorCache = {}
+        self.shared = None
+        self.dirty = set()
+
+    def close(self):
+        """Release the figure, data, and caches. The renderer can't be used afterwards."""
+        if getattr(self, 'artists', None) is not None:
+            self.__clear__()
+        if getattr(self, 'fig', None) is not None:
+            self.fig.clf()
+        self.layoutCache = {}
+
+    def __store__(self, data):
+        """Get the array to keep for `data`: a copy, or a read-only view if copies are disabled or it is memory-mapped."""
+        if isinstance(data, RaggedArray):
+            return RaggedArray(self.__store__(data.buffer), np.copy(data.offsets))
+        if self.copy and not isinstance(data, np.memmap):
+            return np.copy(data)
+        data = data.view()
+        data.flags.writeable = False
+        return data
+
+    def setData(self, i, data):
+        """Replace the data of one series, updating only that series in the plot.
+
+        :param i: The index of the series to replace
+        :param data: The new data for the series, in the same format as one series of the original data. The number
+        of points may differ from the original.
+        """
+        assert isinstance(data, np.ndarray)
+        if not 0 <= i < self.__seriesCount__():
+            raise IndexError('series index out of range: ' + str(i))
+        self.buffers.pop(i, None)
+        self.seriesData[i] = self.__store__(data)
+        self.versions[i] = self.versions.get(i, 0) + 1
+        self.__update__(i)
+
+    def append(self, series, x, y=None):
+        """Append one point to a series, see `extend`.
+
+        :param series: The index of the series to append to
+        :param x: The x value of the new point, or the value for histograms
+        :param y: The y value of the new point, if the series has one
+        """
+        if y is None:
+            self.extend(series, [x])
+        else:
+            self.extend(series, [x], [y])
 
-        # Make sure the layout is good:
-        self.fig.tight_layout()
+    def extend(self, series, x, y=None):
+        """Append several points to a series. The data is stored in a buffer with amortized O(1) appends (bounded by
+        `maxPoints`), and the plot is updated at most `fps` times per second regardless of how often this is called.
 
-        # Generate and show the toolbar if requested:
-        if self.showToolbar.get():
-            self.toolbar = matplotlib.backends.backend_tkagg.NavigationToolbar2TkAgg(self.canvas, self)
-            self.canvas._tkcanvas.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-            self.toolbar.update()
+        :param series: The index of the series to append to
+        :param x: The x values of the new points, or the values for histograms
+        :param y: The y values of the new points, if the series has them
+        """
+        if not 0 <= series < self.__seriesCount__():
+            raise IndexError('series index out of range: ' + str(series))
+        values = [x] if y is None else [x, y]
+
+        if series not in self.buffers:
+            current = self.__series__(series)
+            if len(current.shape) == 1:
+                current = current[np.newaxis]
+            if current.shape[0] != len(values):
+                raise ValueError('series ' + str(series) + ' takes ' + str(current.shape[0]) + ' values per point')
+            # Integer series would truncate the new points, so the buffer takes floats at least:
+            buffer = RingBuffer(current.shape[0], maxlen=self.maxPoints, dtype=np.result_type(current.dtype, np.float64))
+            buffer.extend(current)
+            self.buffers[series] = buffer
+            self.seriesData.pop(series, None)
+        self.buffers[series].extend(values)
+        self.versions[series] = self.versions.get(series, 0) + 1
+        self.__update__(series)
+
+    def sync(self):
+        """Update the plot if the shared data (see `SharedData`) has changed since it was last checked. Windows check
+        this `fps` times per second.
+
+        :returns: `True` if the data had changed
+        """
+        if self.shared is None or self.shared.version == self.sharedVersion:
+            return False
+        self.sharedVersion = self.shared.version
+        for i in range(self.__seriesCount__()):
+            # Series replaced by `setData` or `extend` no longer view the shared data:
+            if i not in self.seriesData and i not in self.buffers:
+                self.versions[i] = self.versions.get(i, 0) + 1
+                self.__update__(i)
+        return True
+
+    def saveFigure(self, filename, dpi=None):
+        """Save the plot to a file.
+
+        :param filename: The file to write, the format is set by the extension (e.g. '.png', '.pdf', or '.svg')
+        :param dpi: (optional) The resolution to use [default=`SAVE_DPI`]
+        :returns: The file name
+        """
+        self.sync()
+        dpi = self.SAVE_DPI if dpi is None else dpi
+        with self.__resolution__(dpi):
+            self.fig.savefig(filename, dpi=dpi)
+        return filename
+
+    def saveData(self, filename, callback=None):
+        """Save the data to a file, written by a worker thread in windows (see `__background__`). The format is set by the extension:
+
+            - '.npy': one array in the same layout as the input data, all series must have the same shape
+            - '.npz': one array per series, named 'series0', 'series1', etc.
+            - '.csv': comma-separated columns with one block of rows per series
+            - anything else: whitespace-separated columns with one block of rows per series
+
+        :param filename: The file to write
+        :param callback: (optional) Called as `callback(filename, error)` when done, where `error` is `None` if the data
+        was saved. If not given, errors are shown in a dialog, or raised without a GUI.
+        :returns: The worker `threading.Thread` for windows, or the file name
+        """
+        series = []
+        for i in range(self.__seriesCount__()):
+            data = self.__series__(i)
+            if i in self.buffers:  # streamed data may change while it is written
+                data = np.copy(data)
+            series.append(data)
+        labels = list(self.labels)
+        ext = os.path.splitext(filename)[1].lower()
+        chunk = self.SAVE_CHUNK
+
+        # The data may be memory-mapped from the file, so it's replaced rather than overwritten:
+        def work(progress):
+            _replaceFile(filename, lambda name: write(name, progress))
+            return filename
+
+        def write(filename, progress):
+            total = max(sum(d.shape[-1] for d in series), 1)
+            done = 0
+            if ext == '.npz':
+                np.savez(filename, **dict(('series' + str(i), series[i]) for i in range(len(series))))
+
+            elif ext == '.npy':
+                if len(set(d.shape for d in series)) > 1:
+                    raise ValueError('Series have different shapes, save as .npz or text instead')
+                shape = series[0].shape if len(series) == 1 else (len(series),) + series[0].shape
+                out = np.lib.format.open_memmap(filename, mode='w+', dtype=series[0].dtype, shape=shape)
+                view = out.reshape((len(series),) + series[0].shape)
+                for i in range(len(series)):
+                    for a in range(0, series[i].shape[-1], chunk):
+                        view[i, ..., a:a+chunk] = series[i][..., a:a+chunk]
+                        done += view[i, ..., a:a+chunk].shape[-1]
+                        progress(done / total)
+                out.flush()
+                del view, out
+
+            else:
+                delimiter = ',' if ext == '.csv' else ' '
+                with open(filename, 'w') as f:
+                    for i in range(len(series)):
+                        f.write('# ' + labels[i] + '\n')
+                        data = series[i].reshape((-1, series[i].shape[-1]))
+                        for a in range(0, data.shape[-1], chunk):
+                            np.savetxt(f, data[:, a:a+chunk].T, delimiter=delimiter)
+                            done += data[:, a:a+chunk].shape[-1]
+                            progress(done / total)
+
+        return self.__background__(work, 'Saving data', callback)
+
+    def __session__(self):
+        """Get the constructor args which recreate the current plot, for `saveSession`."""
+        options = dict(plotType=self.plotTypeVar.get(), fmt=None if self.fmt is None else list(self.fmt),
+                       labels=list(self.labels), xlabel=self.xlabel, xlabelSize=self.xlabelSize, ylabel=self.ylabel,
+                       ylabelSize=self.ylabelSize, title=self.title, titleSize=self.titleSize,
+                       logX=self.logX.get(), logY=self.logY.get(),
+                       xlim=self.__sessionLimits__(self.xlim, self.ax.get_autoscalex_on(), self.ax.get_xlim()),
+                       ylim=self.__sessionLimits__(self.ylim, self.ax.get_autoscaley_on(), self.ax.get_ylim()),
+                       legend=self.legend.get(), legendLoc=self.legendLoc.get(),
+                       legendFontSize=self.legendFontSize.get(), logColor=self.logColor.get(),
+                       decimate=None if self.decimate.get() == 'none' else self.decimate.get(),
+                       collection=self.collection, maxPoints=self.maxPoints)
+        options.update(self.kwargs)
+        if self.bins.get() > 0:
+            options['bins'] = self.bins.get()
+        if self.levels.get() > 0:
+            options['levels'] = self.levels.get()
+        return options
+
+    def __sessionLimits__(self, limits, autoscale, view):
+        """Get the limits of an axis to save in a session: the current view if it was zoomed or panned (i.e. autoscaling
+        is off), else the limits that were set, or `None` so that the reopened plot autoscales too."""
+        if not autoscale:
+            return list(view)
+        return None if limits is None else list(limits)
+
+    def __sessionWindow__(self):
+        """Get the settings of the figure (or window) for `saveSession`, which aren't plot settings."""
+        return dict(figsize=list(self.fig.get_size_inches()), dpi=self.fig.dpi)
+
+    @classmethod
+    def __windowArgs__(cls, window):
+        """Get the constructor args for the figure (or window) settings saved by `__sessionWindow__`."""
+        return dict((key, window[key]) for key in ['figsize', 'dpi'] if key in window)
+
+    def __restoreWindow__(self, window):
+        """Apply the figure (or window) settings saved by `__sessionWindow__` which aren't constructor args."""
+        pass
+
+    def saveSession(self, filename, callback=None):
+        """Save the plot settings and data, to be reopened with `loadSession`. The settings are written to `filename` as
+        JSON, and the data next to it as a '.npy' file with the same name, which is memory-mapped when the session is
+        reopened. Series with different numbers of points are saved as one buffer, with their offsets in the settings.
+        Arrays in the keyword args (e.g. error bars) are saved in a '.arrays.npz' file. The files are written by a
+        worker thread in windows (see `__background__`), the settings last.
+
+        :param filename: The file to write the settings to, e.g. 'analysis.json'
+        :param callback: (optional) Called as `callback(filename, error)` when done, where `error` is `None` if the
+        session was saved. If not given, errors are shown in a dialog, or raised without a GUI.
+        :returns: The worker `threading.Thread` for windows, or the file name
+        :raises TypeError: If a keyword arg can't be saved as JSON
+        """
+        self.__flush__()
+        base = os.path.splitext(filename)[0]
+        options = self.__session__()
+        arrays = dict((key, options.pop(key)) for key in list(options) if isinstance(options[key], np.ndarray))
+        # Series which were replaced or streamed are saved as they are now:
+        data = self.data
+        if len(self.seriesData) > 0 or len(self.buffers) > 0:
+            if self.plotTypeVar.get() in self.GRID_TYPES:
+                data = np.copy(self.__series__(0))
+            else:
+                data = RaggedArray.fromList([self.__series__(i) for i in range(self.__seriesCount__())])
+        state = dict(format=self.SESSION_FORMAT, version=self.SESSION_VERSION, data=os.path.basename(base + '.npy'),
+                     offsets=None, arrays=None, options=options, window=self.__sessionWindow__())
+        if isinstance(data, RaggedArray):
+            state['offsets'] = data.offsets.tolist()
+            data = data.buffer
+        if len(arrays) > 0:
+            state['arrays'] = os.path.basename(base + '.arrays.npz')
+        text = json.dumps(state, indent=1)
+
+        def work(progress):
+            # The data may be memory-mapped from these files (if the session was reopened), so they're replaced rather
+            # than overwritten:
+            _replaceFile(base + '.npy', lambda name: np.save(name, data))
+            if len(arrays) > 0:
+                _replaceFile(base + '.arrays.npz', lambda name: np.savez(name, **arrays))
+            # The settings are written last, so that they only refer to complete data:
+            with open(filename, 'w') as f:
+                f.write(text)
+            return filename
+
+        return self.__background__(work, 'Saving session', callback)
+
+    @classmethod
+    def loadSession(cls, filename, **kwargs):
+        """Reopen a session saved by `saveSession`. The data is memory-mapped rather than read, so this is fast however
+        large it is.
+
+        :param filename: The settings file
+        :param kwargs: Any constructor args to use instead of the saved settings
+        :returns: The new plot (see `open`)
+        :raises ValueError: If the file isn't a session, or is from a newer version
+        """
+        with open(filename) as f:
+            state = json.load(f)
+        if not isinstance(state, dict) or state.get('format') != cls.SESSION_FORMAT:
+            raise ValueError('not an mplWindow session: ' + filename)
+        if state['version'] > cls.SESSION_VERSION:
+            raise ValueError('session is from a newer version of mplWindow: ' + filename)
+        folder = os.path.dirname(os.path.abspath(filename))
+        data = np.load(os.path.join(folder, state['data']), mmap_mode='r')
+        if state['offsets'] is not None:
+            data = RaggedArray(data, state['offsets'])
+        options = cls.__windowArgs__(state['window'])
+        options.update(state['options'])
+        if state['arrays'] is not None:
+            with np.load(os.path.join(folder, state['arrays'])) as arrays:
+                options.update((key, arrays[key]) for key in arrays.files)
+        options.update(kwargs)
+        plot = cls.open(data, **options)
+        plot.__restoreWindow__(state['window'])
+        return plot
+
+    @classmethod
+    def open(cls, data, **kwargs):
+        """Make a plot, the same as the constructor. Windows reuse closed windows instead, see `Plot.open`."""
+        return cls(data, **kwargs)
+
+    def __background__(self, work, text, callback=None):
+        """Run a task, which is done immediately without a GUI (see `Plot.__background__`).
+
+        :param work: The task, called as `work(progress)`, where `progress(fraction)` reports progress
+        :param text: A short description of the task
+        :param callback: (optional) Called as `callback(result, error)` when done, where `error` is `None` if there was
+        no exception. If not given, errors are raised.
+        :returns: The result of the task
+        """
+        try:
+            result = work(lambda fraction: None)
+        except Exception as e:
+            if callback is None:
+                raise
+            callback(None, e)
+            return None
+        if callback is not None:
+            callback(result, None)
+        return result
+
+    def __error__(self, title, error):
+        """Report an error from a task, see `__background__`."""
+        raise error
+
+
+class Plot(Renderer, tk.Toplevel):
+    """Implement a plot window, wrapping `matplotlib` with advanced GUI options that allow the user to change most aspects of the plot appearance.
+
+    Takes the same arguments as `Renderer`, and:
+
+    :param windowTitle: The window title
+    :param blit: Redraw only the data lines over a cached background when the data changes but the axes don't, which
+    is much faster for streaming data.
+
+    :author: Alex Zylstra
+    :date: 2014-07-06
+    """
+    __author__ = 'Alex Zylstra'
+    __version__ = '0.1'
+
+    # Time (ms) to wait for the window size to settle before updating the layout:
+    RESIZE_DELAY = 150
+    # Default maximum rate (per second) for redrawing the canvas:
+    FPS = 30
+    # Time (ms) between checks for results from worker threads:
+    POLL_INTERVAL = 50
+    # The windows which haven't been closed, see `liveWindows`:
+    windows = []
+    # Closed windows are kept withdrawn to be reused, up to this many, see `open`:
+    POOL_SIZE = 4
+    pool = []
+    # New windows start withdrawn while this is set, see `prebuild`:
+    building = False
+
+    def __init__(self, data, plotType=Renderer.TYPE_PLOT, fmt=None, labels=None, 
+        xlabel='', xlabelSize=12, ylabel='', ylabelSize=12,
+        logX=False, logY=False, xlim=None, ylim=None,
+        legend=False, legendLoc=1, legendFontSize=10,
+        title='', titleSize=14, windowTitle='mplWindow', logColor=False, decimate=None, blit=False, collection=None, copy=True, maxPoints=None, **kwargs):
+        tk.Toplevel.__init__(self)
+        if Plot.building:
+            self.withdraw()
+        self.title(windowTitle)
+        self.windowTitle = windowTitle
+
+        # Worker threads report back to the Tk thread through this queue, see `__background__`:
+        self.tasks = queue.Queue()
+        self.workers = 0
+        self.pollJob = None
+        # Points pushed by other threads or processes, added from the Tk thread, see `channel`:
+        self.channels = []
+        self.drainJob = None
+        self.drainInterval = None
+        # Shared data is checked for changes, see `__watch__`:
+        self.watchJob = None
+        # Rendering is deferred until Tk is idle, see `__update__`:
+        self.renderJob = None
+        self.fps = self.FPS
+        self.lastRender = 0
+        # Resize handling, see `__resize__`:
+        self.resizeEvent = None
+        self.resizeJob = None
+
+        self.menubar = None
+        self.toolbar = None
+        self.frame = tk.Frame(self)
+        self.frame.pack()
+
+        Renderer.__init__(self, data, plotType=plotType, fmt=fmt, labels=labels,
+                          xlabel=xlabel, xlabelSize=xlabelSize, ylabel=ylabel, ylabelSize=ylabelSize,
+                          logX=logX, logY=logY, xlim=xlim, ylim=ylim,
+                          legend=legend, legendLoc=legendLoc, legendFontSize=legendFontSize,
+                          title=title, titleSize=titleSize, logColor=logColor, decimate=decimate,
+                          collection=collection, copy=copy, maxPoints=maxPoints, **kwargs)
+
+        # Blitting, see `__blit__`:
+        self.blit = blit
+        self.background = None
+        self.overlays = []
+        # Performance overlay, see `__hud__`:
+        self.hud = None
+        self.canvas.mpl_connect('draw_event', self.__drawn__)
+
+        self.__menubar__()
+        Plot.windows.append(self)
+        # add a key binding to close:
+        self.bind('<Escape>', self.__close__)
+        self.protocol("WM_DELETE_WINDOW", self.__close__)
+        self.protocol("WM_STATE_ZOOMED", self.__zoom__)
+        self.bind("<Configure>", self.__resize__)
+
+        self.__watch__()
+        self.__flush__()
+
+    def __variable__(self, value):
+        """Make a Tk variable holding a setting, so that it can be used by the menus.
+
+        :param value: The initial value
+        """
+        if isinstance(value, bool):
+            var = tk.BooleanVar()
+        elif isinstance(value, int):
+            var = tk.IntVar()
         else:
-            if self.toolbar is not None:
-                self.toolbar.destroy()
+            var = tk.StringVar()
+        var.set(value)
+        return var
 
-        # Update the canvas at the end:
-        self.canvas.draw()
+    def __initPlot__(self):
+        """Initialization for the matplotlib infrastructure, e.g. setting up the figure and canvas."""
+        # The backend is only selected when the first window is made, so that importing this module doesn't change it:
+        if plt.get_backend() != 'TkAgg':
+            plt.switch_backend('TkAgg')
+        matplotlib.rcParams['toolbar'] = 'None'
+
+        if self.fig == None:
+            self.fig = matplotlib.pyplot.Figure(figsize=self.figsize, dpi=self.dpi)
+            self.ax = self.fig.add_subplot(111)
+        
+
+        if self.canvas is None:
+            self.canvas = matplotlib.backends.backend_tkagg.FigureCanvasTkAgg(self.fig, master=self)
+            self.canvas.draw()
+            self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+            # The canvas resizes the figure on every event, instead this is done by `__resize__` when the size settles:
+            self.canvas.get_tk_widget().unbind('<Configure>')
+           
+        self.frame.pack()
 
-    def __menubar__(self, plotType=TYPE_PLOT):
-        """Generate the window menus.
+    def __update__(self, *parts):
+        """Bring parts of the plot up to date with the current parameters and redraw the canvas.
 
-        :param plotType: (optional) the type of plot to start as [default=TYPE_PLOT]
+        The update is deferred until Tk is idle, so that several changes in a row are rendered together, and the canvas
+        is redrawn at most `fps` times per second.
+
+        :param parts: The parts to update, see `Renderer.__update__`
+        """
+        super(Plot, self).__update__(*parts)
+        if self.batchDepth == 0 and self.renderJob is None:
+            wait = self.lastRender + 1./self.fps - time.perf_counter()
+            if wait > 0:
+                self.renderJob = self.after(int(1000*wait) + 1, self.__flush__)
+            else:
+                self.renderJob = self.after_idle(self.__flush__)
+
+    def __flush__(self):
+        """Render any pending updates immediately."""
+        if self.renderJob is not None:
+            self.after_cancel(self.renderJob)
+            self.renderJob = None
+        super(Plot, self).__flush__()
+
+    def __render__(self, parts):
+        """Apply the updates in `parts` (see `Renderer.__update__`) to the existing artists, then draw."""
+        series = [x for x in parts if isinstance(x, int)]
+        limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        parts = super(Plot, self).__render__(parts)
+        if parts is None:
+            return None
+        if 'toolbar' in parts:
+            with self.__stage__('toolbar'):
+                self.__applyToolbar__()
+        if self.hud is not None:
+            self.__applyHud__()
+
+        # Update the canvas at the end, if only animated artists changed they can be redrawn over the background:
+        with self.__stage__('draw'):
+            if (self.blit and self.background is not None and parts <= set(series) | {'autoscale', 'lod', 'overlay'}
+                    and limits == (self.ax.get_xlim(), self.ax.get_ylim())):
+                self.__blit__()
+            else:
+                self.canvas.draw()
+        self.lastRender = time.perf_counter()
+        return parts
+
+    def __hud__(self, *args):
+        """Show or hide the performance overlay (see `profile`), which turns on timing while it is shown."""
+        if self.showStats.get() and self.hud is None:
+            if self.stats is None:
+                self.profile()
+            self.hud = self.fig.text(0.01, 0.99, '', ha='left', va='top', family='monospace', fontsize=8,
+                                     bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'))
+            self.addOverlay(self.hud)
+        elif not self.showStats.get() and self.hud is not None:
+            self.removeOverlay(self.hud)
+            self.hud = None
+            if self.statsCallback is None:
+                self.profile(False)
+
+    def __applyHud__(self):
+        """Show the latest `stats` in the performance overlay."""
+        # Timing may have been stopped with `profile(False)` while the overlay is shown:
+        if self.stats is None or 'renders' not in self.stats:
+            return
+        self.hud.set_text('{:.1f} fps\nrender {:.1f} ms\n{:d} points'.format(
+            self.stats['fps'], 1000 * self.stats['render'], self.stats['points']))
+
+    def __drawn__(self, event):
+        """Handle a full draw of the canvas by caching the background for blitting and drawing the animated artists."""
+        if self.blit:
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.__drawAnimated__()
+
+    def __drawAnimated__(self):
+        """Draw the animated artists, i.e. the data lines when blitting and any overlays."""
+        for artists in self.artists + [self.collections]:
+            for a in artists:
+                if isinstance(a, matplotlib.artist.Artist) and a.get_animated():
+                    self.ax.draw_artist(a)
+        for a in self.overlays:
+            if a.axes is not None:
+                a.axes.draw_artist(a)
+            else:
+                self.fig.draw_artist(a)
+
+    def __blit__(self):
+        """Redraw only the animated artists over the cached background."""
+        self.canvas.restore_region(self.background)
+        self.__drawAnimated__()
+        self.canvas.blit(self.fig.bbox)
+
+    def addOverlay(self, artist):
+        """Add an overlay, e.g. a cursor or crosshair, which can be moved without redrawing the rest of the plot::
+
+            line = plot.ax.axvline(0)
+            plot.addOverlay(line)
+            ...
+            line.set_xdata([x])
+            plot.refresh()
+
+        :param artist: A `matplotlib` artist that has already been added to the plot
+        """
+        artist.set_animated(True)
+        self.overlays.append(artist)
+        self.__update__('overlay')
+
+    def removeOverlay(self, artist):
+        """Remove an overlay added with `addOverlay`, and from the plot.
+
+        :param artist: The overlay to remove
         """
+        self.overlays.remove(artist)
+        artist.remove()
+        self.__update__('overlay')
+
+    def refresh(self):
+        """Redraw the overlays after changing them."""
+        self.__update__('overlay')
+
+    def __applyToolbar__(self):
+        """Show or hide the toolbar as requested. It is only created the first time it is shown, and then kept."""
+        if self.showToolbar.get():
+            if self.toolbar is None:
+                self.toolbar = matplotlib.backends.backend_tkagg.NavigationToolbar2Tk(self.canvas, self)
+                self.toolbar.update()
+            # Pack the toolbar before the canvas, so that it keeps its space when the window shrinks:
+            self.canvas.get_tk_widget().pack_forget()
+            self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+            self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+        elif self.toolbar is not None:
+            self.toolbar.pack_forget()
+
+    def __menubar__(self):
+        """Generate the window menus."""
         # Top-level menu bar:
         # window = plt.get_current_fig_manager().window
         self.menubar = tk.Menu(self)
@@ -310,6 +2272,8 @@ class Plot(tk.Toplevel):
         fileMenu.add_command(label=tempText + shortcutType + 'S', command= lambda: self.__save__('plot'))
         self.bind('<' + shortcutModifier + 's>', lambda *args: self.__save__('plot'))
         fileMenu.add_command(label='Save data', command= lambda: self.__save__('data'))
+        fileMenu.add_command(label='Save session', command= lambda: self.__save__('session'))
+        fileMenu.add_command(label='Open session', command=self.__openSession__)
         # Tabs not supported on Windows
         if platform.system() == 'Darwin':
             tempText = 'Quit\t\t\t'
@@ -330,36 +2294,38 @@ class Plot(tk.Toplevel):
         plotMenu.add_separator()
         plotMenu.add_checkbutton(label='Log x', onvalue=True, offvalue=False, variable=self.logX)
         plotMenu.add_checkbutton(label='Log y', onvalue=True, offvalue=False, variable=self.logY)
+        plotMenu.add_checkbutton(label='Log color', onvalue=True, offvalue=False, variable=self.logColor)
         plotMenu.add_command(label='Set x limits', command=self.__setXLim__)
         plotMenu.add_command(label='Set y limits', command=self.__setYLim__)
+        decimateMenu = tk.Menu(plotMenu)
+        plotMenu.add_cascade(label='Decimation', menu=decimateMenu)
+        decimateMenu.add_radiobutton(label='None', value='none', variable=self.decimate)
+        decimateMenu.add_radiobutton(label='Min/Max', value='minmax', variable=self.decimate)
+        decimateMenu.add_radiobutton(label='LTTB', value='lttb', variable=self.decimate)
 
         # submenu for plot type
         plotMenu.add_separator()
-        plotTypeMenu = tk.Menu(plotMenu)
-        plotMenu.add_cascade(label='Plot Type', menu=plotTypeMenu)
-        self.plotTypeVar = tk.IntVar()
-        # Check the shape to enable or disable various types:
-        if len(self.data.shape) >= 2:
-            shape = self.data.shape[-2]
-        else:
-            shape = 1
-        # Types of plots take 1-, 2-, or 3-D data
-        stateHist = tk.NORMAL if shape == 1 or self.data.shape[0] == len(self.labels) else tk.DISABLED
-        state2 = tk.NORMAL if shape == 2 else tk.DISABLED
-        state3 = tk.NORMAL if shape == 3 else tk.DISABLED
-        state4 = tk.NORMAL if shape == 4 else tk.DISABLED
-        plotTypeMenu.add_radiobutton(label='Plot', value=self.TYPE_PLOT, variable=self.plotTypeVar, state=state2)
-        plotTypeMenu.add_radiobutton(label='Error Bar', value=self.TYPE_ERRORBAR, variable=self.plotTypeVar, state=state2)
-        plotTypeMenu.add_radiobutton(label='Bar', value=self.TYPE_BAR, variable=self.plotTypeVar, state=state2)
-        plotTypeMenu.add_radiobutton(label='Histogram', value=self.TYPE_HISTOGRAM, variable=self.plotTypeVar, state=stateHist)
-        plotTypeMenu.add_radiobutton(label='2-D Histogram', value=self.TYPE_2DHISTOGRAM, variable=self.plotTypeVar, state=state2)
-        plotTypeMenu.add_radiobutton(label='Contour', value=self.TYPE_CONTOUR, variable=self.plotTypeVar, state=state3)
-        plotTypeMenu.add_radiobutton(label='Image', value=self.TYPE_IMAGE, variable=self.plotTypeVar)
-        plotTypeMenu.add_radiobutton(label='Color Mesh', value=self.TYPE_COLORMESH, variable=self.plotTypeVar, state=state3)
-        plotTypeMenu.add_radiobutton(label='Date Plot', value=self.TYPE_DATEPLOT, variable=self.plotTypeVar, state=state2)
-        plotTypeMenu.add_radiobutton(label='Vector', value=self.TYPE_VECTOR, variable=self.plotTypeVar, state=state4)
-        self.plotTypeVar.set(plotType)
-        self.plotTypeVar.trace('w', self.__plot__)
+        self.plotTypeMenu = tk.Menu(plotMenu)
+        plotMenu.add_cascade(label='Plot Type', menu=self.plotTypeMenu)
+        # Which types are enabled depends on the data, see `__dataMenus__`:
+        self.plotTypeMenu.add_radiobutton(label='Plot', value=self.TYPE_PLOT, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Error Bar', value=self.TYPE_ERRORBAR, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Bar', value=self.TYPE_BAR, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Histogram', value=self.TYPE_HISTOGRAM, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='2-D Histogram', value=self.TYPE_2DHISTOGRAM, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Contour', value=self.TYPE_CONTOUR, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Image', value=self.TYPE_IMAGE, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Color Mesh', value=self.TYPE_COLORMESH, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Date Plot', value=self.TYPE_DATEPLOT, variable=self.plotTypeVar)
+        self.plotTypeMenu.add_radiobutton(label='Vector', value=self.TYPE_VECTOR, variable=self.plotTypeVar)
+        binsMenu = tk.Menu(plotMenu)
+        plotMenu.add_cascade(label='Histogram bins', menu=binsMenu)
+        for bins in [10, 20, 50, 100, 200, 500, 1000]:
+            binsMenu.add_radiobutton(label=str(bins), value=bins, variable=self.bins)
+        levelsMenu = tk.Menu(plotMenu)
+        plotMenu.add_cascade(label='Contour levels', menu=levelsMenu)
+        for levels in [5, 10, 20, 50, 100]:
+            levelsMenu.add_radiobutton(label=str(levels), value=levels, variable=self.levels)
 
         # Controls for the legend:
         plotMenu.add_separator()
@@ -387,8 +2353,6 @@ class Plot(tk.Toplevel):
 
         self.relabelMenu = tk.Menu(plotMenu)
         plotMenu.add_cascade(label='Relabel...', menu=self.relabelMenu)
-        for i in range(len(self.labels)):
-            self.relabelMenu.add_command(label=self.labels[i], command= lambda i=i: self.__relabel__(i))
 
         # Window menu
         windowMenu = tk.Menu(self.menubar, tearoff=0)
@@ -399,7 +2363,10 @@ class Plot(tk.Toplevel):
         windowMenu.add_separator()
         self.showToolbar = tk.BooleanVar()
         windowMenu.add_checkbutton(label='Show Toolbar', onvalue=True, offvalue=False, variable=self.showToolbar)
-        self.showToolbar.trace('w', self.__plot__)
+        self.showToolbar.trace('w', lambda *args: self.__update__('toolbar'))
+        self.showStats = tk.BooleanVar()
+        windowMenu.add_checkbutton(label='Show Performance', onvalue=True, offvalue=False, variable=self.showStats)
+        self.showStats.trace('w', self.__hud__)
 
         # Help menu:
         helpMenu = tk.Menu(self.menubar, tearoff=0)
@@ -407,46 +2374,392 @@ class Plot(tk.Toplevel):
         # Options in the help menu:
         helpMenu.add_command(label='About', command=self.__about__)
 
+        self.__dataMenus__()
         self.config(menu=self.menubar)
 
+    def __dataMenus__(self):
+        """Update the parts of the menus which depend on the data: the plot types and the relabel submenu."""
+        # Check the shape to enable or disable various types:
+        if isinstance(self.data, RaggedArray):
+            shape = self.data.buffer.shape[0] if len(self.data.buffer.shape) == 2 else 1
+        elif len(self.data.shape) >= 2:
+            shape = self.data.shape[-2]
+        else:
+            shape = 1
+        # Types of plots take 1-, 2-, or 3-D data
+        stateHist = tk.NORMAL if shape == 1 or (isinstance(self.data, np.ndarray) and self.data.shape[0] == len(self.labels)) else tk.DISABLED
+        state2 = tk.NORMAL if shape == 2 else tk.DISABLED
+        state3 = tk.NORMAL if shape == 3 else tk.DISABLED
+        state4 = tk.NORMAL if shape == 4 else tk.DISABLED
+        # Color meshes (and contours) can also take a 2-D grid, or the X, Y, and values as a (3, ny, nx) array:
+        if isinstance(self.data, np.ndarray) and (len(self.data.shape) == 2 or (len(self.data.shape) == 3 and self.data.shape[0] == 3)):
+            state3 = tk.NORMAL
+        # Images take a 2-D grid, or a (ny, nx, 3|4) array of RGB(A) colors:
+        stateImage = tk.NORMAL if isinstance(self.data, np.ndarray) and (len(self.data.shape) == 2 or (len(self.data.shape) == 3 and self.data.shape[2] in [3, 4])) else tk.DISABLED
+        # In the order of the plot type menu, after its tear-off entry:
+        states = [state2, state2, state2, stateHist, state2, state3, stateImage, state3, state2, state4]
+        first = int(self.plotTypeMenu.cget('tearoff'))
+        for i in range(len(states)):
+            self.plotTypeMenu.entryconfig(first+i, state=states[i])
+
+        first = int(self.relabelMenu.cget('tearoff'))
+        self.relabelMenu.delete(first, 'end')
+        for i in range(len(self.labels)):
+            self.relabelMenu.add_command(label=self.labels[i], command= lambda i=i: self.__relabel__(i))
+
     def __save__(self, type, *args):
-        #TODO: implement saving
-        pass
+        """Prompt the user for a file name, and save the plot, its data, or the session in the background.
+
+        :param type: What to save, 'plot', 'data', or 'session'
+        """
+        if type == 'plot':
+            filename = filedialog.asksaveasfilename(parent=self, title='Save plot', defaultextension='.png',
+                                         filetypes=[('PNG', '.png'), ('PDF', '.pdf'), ('SVG', '.svg')])
+            if not filename:
+                return
+            dpi = None
+            # Only ask for the resolution if the format is raster:
+            if os.path.splitext(filename)[1].lower() not in ['.pdf', '.svg', '.eps', '.ps']:
+                p = textPrompt(self, title='Resolution (DPI)', initValue=self.SAVE_DPI, getFontSize=False)
+                if p.result is None:
+                    return
+                try:
+                    dpi = float(p.result[0])
+                except ValueError:
+                    messagebox.showerror(title='Save plot', message='Invalid resolution: ' + p.result[0])
+                    return
+            self.saveFigure(filename, dpi=dpi)
+
+        elif type == 'data':
+            filename = filedialog.asksaveasfilename(parent=self, title='Save data', defaultextension='.npy',
+                                         filetypes=[('NumPy', '.npy'), ('NumPy archive', '.npz'), ('CSV', '.csv'),
+                                                    ('Text', '.txt')])
+            if not filename:
+                return
+            self.saveData(filename)
+
+        elif type == 'session':
+            filename = filedialog.asksaveasfilename(parent=self, title='Save session', defaultextension='.json',
+                                         filetypes=[('Session', '.json')])
+            if not filename:
+                return
+            try:
+                self.saveSession(filename)
+            except TypeError as e:
+                self.__error__('Save session', e)
+
+    def __openSession__(self, *args):
+        """Prompt the user for a session file, and open it in a new window."""
+        filename = filedialog.askopenfilename(parent=self, title='Open session', filetypes=[('Session', '.json')])
+        if not filename:
+            return
+        try:
+            Plot.loadSession(filename)
+        except (OSError, ValueError, KeyError) as e:
+            self.__error__('Open session', e)
+
+    def __sessionWindow__(self):
+        """Get the window settings for `saveSession`."""
+        window = super(Plot, self).__sessionWindow__()
+        window.update(windowTitle=self.windowTitle, blit=self.blit, geometry=self.geometry(),
+                      toolbar=self.showToolbar.get())
+        return window
+
+    @classmethod
+    def __windowArgs__(cls, window):
+        """Get the constructor args for the window settings saved by `__sessionWindow__`."""
+        args = super(Plot, cls).__windowArgs__(window)
+        args.update((key, window[key]) for key in ['windowTitle', 'blit'] if key in window)
+        return args
+
+    def __restoreWindow__(self, window):
+        """Apply the window size and toolbar saved by `__sessionWindow__`."""
+        if 'geometry' in window:
+            self.geometry(window['geometry'])
+        self.showToolbar.set(window.get('toolbar', False))
+
+    def saveFigure(self, filename, dpi=None, callback=None, overlays=False):
+        """Save the plot to a file. A copy of the figure is rendered on a separate canvas in a worker thread, so that
+        the window stays responsive during large or high-resolution exports. The performance overlay is never saved.
+
+        :param filename: The file to write, the format is set by the extension (e.g. '.png', '.pdf', or '.svg')
+        :param dpi: (optional) The resolution to use [default=`SAVE_DPI`]
+        :param overlays: (optional) Save the overlays added with `addOverlay` too [default=False]
+        :param callback: (optional) Called on the Tk thread as `callback(filename, error)` when done, where `error` is
+        `None` if the plot was saved. If not given, errors are shown in a dialog.
+        :returns: The worker `threading.Thread`
+        """
+        # Snapshot the figure now, so later changes to this window don't affect the export:
+        if dpi is None:
+            dpi = self.SAVE_DPI
+        # The artists to leave out are pickled along with the figure, so that their copies can be found:
+        hidden = [a for a in self.overlays if not overlays or a is self.hud]
+        with self.__resolution__(dpi):
+            state = pickle.dumps((self.fig, hidden))
+
+        def work(progress):
+            fig, hidden = pickle.loads(state)
+            for a in hidden:
+                a.remove()
+            for a in fig.findobj(lambda a: a.get_animated()):
+                a.set_animated(False)
+            matplotlib.backends.backend_agg.FigureCanvasAgg(fig)
+            fig.savefig(filename, dpi=dpi)
+            return filename
+
+        return self.__background__(work, 'Saving plot', callback)
+
+    def __background__(self, work, text, callback=None):
+        """Run a task in a worker thread. Tk is not thread-safe, so the results are passed back through a queue which
+        is checked from the Tk event loop.
+
+        :param work: The task, called as `work(progress)` in the worker thread, where `progress(fraction)` reports
+        progress, which is shown in the window title
+        :param text: A short description of the task
+        :param callback: (optional) Called on the Tk thread as `callback(result, error)` when done, where `error` is
+        `None` if there was no exception. If not given, errors are shown in a dialog.
+        :returns: The worker `threading.Thread`
+        """
+        def run():
+            try:
+                result = work(lambda fraction: self.tasks.put((self.__progress__, (text, fraction))))
+                self.tasks.put((self.__finished__, (text, result, None, callback)))
+            except Exception as e:
+                self.tasks.put((self.__finished__, (text, None, e, callback)))
+
+        thread = threading.Thread(target=run, name='mplWindow: ' + text)
+        thread.daemon = True
+        self.workers += 1
+        thread.start()
+        if self.pollJob is None:
+            self.pollJob = self.after(self.POLL_INTERVAL, self.__poll__)
+        return thread
+
+    def __error__(self, title, error):
+        """Show an error from a task in a dialog."""
+        messagebox.showerror(title=title, message=str(error))
+
+    def __poll__(self):
+        """Handle anything reported by worker threads."""
+        self.pollJob = None
+        while True:
+            try:
+                function, args = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            function(*args)
+        if self.workers > 0:
+            self.pollJob = self.after(self.POLL_INTERVAL, self.__poll__)
+
+    def __watch__(self):
+        """Check `fps` times per second whether the shared data has changed, see `sync`."""
+        self.watchJob = None
+        if self.shared is not None:
+            self.sync()
+            self.watchJob = self.after(max(int(1000. / self.fps), 1), self.__watch__)
+
+    def channel(self, maxlen=1024, drop='oldest', rate=None, source=None):
+        """Make a thread-safe channel which other threads (or processes, through `source`) can push points to without
+        blocking, see `Channel`. The queued points are taken on the Tk thread `rate` times per second and added to the
+        plot with `extend`, all of them with a single redraw.
+
+        :param maxlen: (optional) The maximum number of batches of points to queue [default=1024]
+        :param drop: (optional) Which batch to drop when the queue is full, 'oldest' or 'newest' [default='oldest']
+        :param rate: (optional) How many times per second to take the queued points [default=`fps`]
+        :param source: (optional) A `multiprocessing.Queue` which other processes put batches into, see `Channel`
+        :returns: The `Channel`, which producers call `push` on
+        """
+        channel = Channel(maxlen=maxlen, drop=drop, source=source)
+        self.channels.append(channel)
+        interval = max(int(1000. / (rate or self.fps)), 1)
+        if self.drainInterval is None or interval < self.drainInterval:
+            self.drainInterval = interval
+        if self.drainJob is None:
+            self.drainJob = self.after(self.drainInterval, self.__drain__)
+        return channel
+
+    def __drain__(self):
+        """Add the points queued in the channels to the plot, see `channel`."""
+        self.drainJob = None
+        with self.batch():
+            for channel in list(self.channels):
+                # Join the batches for each series, so that each series is only extended once:
+                points = {}
+                for series, x, y in channel.drain():
+                    points.setdefault(series, []).append((x, y))
+                for series in points:
+                    try:
+                        x = np.concatenate([np.atleast_1d(x) for x, y in points[series]])
+                        y = None if points[series][0][1] is None else np.concatenate([np.atleast_1d(y) for x, y in points[series]])
+                        self.extend(series, x, y)
+                    except Exception as e:
+                        # The producer can't be told from here, so stop taking its points:
+                        channel.close()
+                        self.__error__('Adding data', e)
+                        break
+                if channel.closed and len(channel) == 0:
+                    self.channels.remove(channel)
+        if len(self.channels) > 0:
+            self.drainJob = self.after(self.drainInterval, self.__drain__)
+        else:
+            self.drainInterval = None
+
+    def __progress__(self, text, fraction):
+        """Show the progress of a worker thread."""
+        self.wm_title(self.windowTitle + ' - ' + text + ' ' + str(int(100 * fraction)) + '%')
+
+    def __finished__(self, text, result, error, callback):
+        """Handle completion of a worker thread."""
+        self.workers -= 1
+        if self.workers == 0:
+            self.wm_title(self.windowTitle)
+        if callback is not None:
+            callback(result, error)
+        elif error is not None:
+            self.__error__(text, error)
 
     def __setXLabel__(self, *args):
         """Prompt the user for a new x label and apply the new setting."""
         t = self.ax.xaxis.get_label()
         p = textPrompt(self, title='Set x label', initValue=t.get_text(), initFontSize=t.get_fontsize())
         if p.result is not None:
-            self.ax.set_xlabel(p.result[0], fontsize=p.result[1])
-            self.canvas.draw()
             self.xlabel = p.result[0]
             self.xlabelSize = p.result[1]
+            self.__update__('labels')
 
     def __setYLabel__(self, *args):
         """Prompt the user for a new y label and apply the new setting."""
         t = self.ax.yaxis.get_label()
         p = textPrompt(self, title='Set y label', initValue=t.get_text(), initFontSize=t.get_fontsize())
         if p.result is not None:
-            self.ax.set_ylabel(p.result[0], fontsize=p.result[1])
-            self.canvas.draw()
             self.ylabel = p.result[0]
             self.ylabelSize = p.result[1]
+            self.__update__('labels')
 
     def __setTitle__(self, *args):
         """Prompt the user for a new plot title and apply the new setting."""
         t = self.ax.title
         p = textPrompt(self, title='Set title', initValue=t.get_text(), initFontSize=t.get_fontsize())
         if p.result is not None:
-            self.ax.set_title(p.result[0], fontsize=p.result[1])
-            self.fig.tight_layout()
-            self.canvas.draw()
             self.title = p.result[0]
             self.titleSize = p.result[1]
+            self.__update__('labels')
 
     def __close__(self, *args):
         """Close this window."""
+        self.close()
+
+    def close(self):
+        """Close this window, releasing the data and caches it holds. The window itself is kept withdrawn to be reused
+        by `open` if the pool isn't full, otherwise it is destroyed."""
         self.withdraw()
+        for job in [self.renderJob, self.resizeJob, self.drainJob, self.watchJob]:
+            if job is not None:
+                self.after_cancel(job)
+        self.renderJob = self.resizeJob = self.drainJob = self.watchJob = None
+        for channel in self.channels:
+            channel.close()
+        self.channels = []
+        self.__clear__()
+        # Discard the results of background work for the old data, e.g. contours which are still being computed:
+        first = max(self.versions.values(), default=-1) + 1
+        self.versions = dict.fromkeys(self.versions, first)
+        if self in Plot.windows:
+            Plot.windows.remove(self)
+        Plot.pool.append(self)
+        # Destroy the least recently used windows beyond the size of the pool:
+        while len(Plot.pool) > self.POOL_SIZE:
+            Plot.pool.pop(0).destroy()
+
+    def __reset__(self, data, windowTitle='mplWindow', blit=False, figsize=(4,3), dpi=100, **kwargs):
+        """Reuse this window for new data and settings, see `open`. Takes the same arguments as the constructor."""
+        # The canvas is sized for the new figure, and the window fits it rather than any size it was given before:
+        self.figsize = figsize
+        self.dpi = dpi
+        self.fig.set_dpi(dpi)
+        self.fig.set_size_inches(figsize)
+        self.canvas.get_tk_widget().configure(width=int(figsize[0] * dpi), height=int(figsize[1] * dpi))
+        self.geometry('')
+        self.wm_title(windowTitle)
+        self.windowTitle = windowTitle
+        self.showStats.set(False)
+        self.profile(False)
+        for a in self.overlays:
+            a.remove()
+        self.overlays = []
+        self.blit = blit
+        self.background = None
+        self.fps = self.FPS
+        with self.batch():
+            Renderer.__reset__(self, data, **kwargs)
+            self.showToolbar.set(False)
+            self.__dataMenus__()
+        if self.toolbar is not None:
+            self.toolbar.update()
+        self.__watch__()
+
+    @classmethod
+    def open(cls, data, **kwargs):
+        """Open a window, reusing a withdrawn one from the pool (see `prebuild`) if there is one, which is much faster
+        than making a new window. Takes the same arguments as the constructor.
+
+        :returns: The window
+        """
+        for window in reversed(Plot.pool):
+            if type(window) is cls:
+                Plot.pool.remove(window)
+                try:
+                    window.__reset__(data, **kwargs)
+                except Exception:
+                    # The window may be partly reset, so it isn't reused:
+                    window.destroy()
+                    raise
+                Plot.windows.append(window)
+                window.deiconify()
+                return window
+        return cls(data, **kwargs)
+
+    @classmethod
+    def prebuild(cls, count=None):
+        """Make withdrawn windows ahead of time for `open` to reuse.
+
+        :param count: (optional) The number of windows to have ready, by default `POOL_SIZE`
+        """
+        count = cls.POOL_SIZE if count is None else min(count, cls.POOL_SIZE)
+        Plot.building = True
+        try:
+            while len([window for window in Plot.pool if type(window) is cls]) < count:
+                cls(np.zeros((2, 1))).close()
+        finally:
+            Plot.building = False
+
+    def destroy(self):
+        """Destroy this window, and release the figure, data, and caches it holds. This is also called when the parent
+        window is destroyed."""
+        if self in Plot.windows:
+            Plot.windows.remove(self)
+        if self in Plot.pool:
+            Plot.pool.remove(self)
+        for job in [self.renderJob, self.resizeJob, self.pollJob, self.drainJob, self.watchJob]:
+            if job is not None:
+                self.after_cancel(job)
+        self.renderJob = self.resizeJob = self.pollJob = self.drainJob = self.watchJob = None
+        for channel in self.channels:
+            channel.close()
+        self.channels = []
+        Renderer.close(self)
+        tk.Toplevel.destroy(self)
+
+    @classmethod
+    def liveWindows(cls):
+        """Get the `Plot` windows which haven't been closed."""
+        return list(cls.windows)
+
+    @classmethod
+    def liveMemory(cls):
+        """Get the memory (in bytes) held by the data and caches of the windows which haven't been closed, see
+        `Renderer.nbytes`."""
+        return sum(window.nbytes for window in cls.windows)
 
     def __about__(self, *args):
         """Display information about the module."""
@@ -464,15 +2777,28 @@ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the \n \
 GNU General Public License for more details. \n \n \
 You should have received a copy of the GNU General Public License \n \
 along with this program.  If not, see <http://www.gnu.org/licenses/>.'
-        showinfo(title=title, message=text)
+        messagebox.showinfo(title=title, message=text)
     
+
     def __resize__(self, event):
-        """Handle configuration (i.e. resize) GUI events."""
-        # Need to make sure the figure packing is done correctly:
-        try:
-            self.fig.tight_layout()
-        except ValueError as e:
-            pass
+        """Handle configuration (i.e. resize) GUI events, waiting until the size settles to resize the figure."""
+        # Events from every child widget arrive here, but only the canvas size matters:
+        if self.canvas is None or event.widget is not self.canvas.get_tk_widget():
+            return
+        if self.resizeEvent is not None and (event.width, event.height) == (self.resizeEvent.width, self.resizeEvent.height):
+            return
+
+        self.resizeEvent = event
+        if self.resizeJob is not None:
+            self.after_cancel(self.resizeJob)
+        self.resizeJob = self.after(self.RESIZE_DELAY, self.__resized__)
+
+    def __resized__(self):
+        """Resize the figure to the settled canvas size, and update the layout."""
+        self.resizeJob = None
+        self.background = None
+        self.canvas.resize(self.resizeEvent)
+        self.__update__('layout', 'lod', 'view')
 
     def __zoom__(self, *args):
         """Handle window zoom action."""
@@ -484,8 +2810,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'
         p = textPrompt(self, title='Relabel '+self.labels[i], initValue=self.labels[i], getFontSize=False)
         if p.result is not None:
             self.labels[i] = p.result[0]
-            self.__plot__()
-            self.relabelMenu.entryconfig(i, label=p.result[0])
+            if self.handles[i] is not None:
+                self.handles[i].set_label(p.result[0])
+            self.__update__('legend')
+            self.relabelMenu.entryconfig(int(self.relabelMenu.cget('tearoff'))+i, label=p.result[0])
 
     def __setXLim__(self, *args):
         """Set new x axis limits"""
@@ -493,8 +2821,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'
         p = limitPrompt(self, title='x axis limits', initValue=curr)
         if p.result is not None:
             self.xlim = p.result
-            self.ax.set_xlim(self.xlim[0], self.xlim[1])
-            self.canvas.draw()
+            self.__update__('limits')
 
     def __setYLim__(self, *args):
         """Set new y axis limits"""
@@ -502,8 +2829,714 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'
         p = limitPrompt(self, title='y axis limits', initValue=curr)
         if p.result is not None:
             self.ylim = p.result
-            self.ax.set_ylim(self.ylim[0], self.ylim[1])
-            self.canvas.draw()
+            self.__update__('limits')
+
+
+def renderMany(datasets, filenames, processes=None, dpi=None, **kwargs):
+    """Render many plots with the same styling to files, without a GUI, using a pool of worker processes::
+
+        renderMany([data1, data2, 'data3.npy'], ['1.png', '2.png', '3.png'], plotType=Plot.TYPE_HISTOGRAM, logY=True)
+
+    :param datasets: The data for each plot, in any form `Renderer` takes. Paths of '.npy' files are loaded by the
+    workers, which avoids sending the data to them.
+    :param filenames: The file to write for each plot, the format is set by the extension
+    :param processes: (optional) The number of worker processes [default=number of CPUs]
+    :param dpi: (optional) The resolution to use [default=`Renderer.SAVE_DPI`]
+    :param kwargs: Any additional keyword args are passed to `Renderer`, e.g. the plot type, labels, and styling
+    :returns: The `list` of files written
+    """
+    if len(datasets) != len(filenames):
+        raise ValueError('need one file name per dataset')
+    tasks = [(data, filename, dpi, kwargs) for data, filename in zip(datasets, filenames)]
+    if len(tasks) == 0:
+        return []
+    pool = multiprocessing.Pool(processes)
+    try:
+        # Several plots per task, so that the overhead of sending tasks to the workers is small:
+        chunk = max(1, len(tasks) // (4 * (processes or multiprocessing.cpu_count())))
+        return pool.map(_render, tasks, chunksize=chunk)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _render(task):
+    """Render one plot for `renderMany`, in a worker process."""
+    data, filename, dpi, kwargs = task
+    renderer = Renderer(data, **kwargs)
+    renderer.saveFigure(filename, dpi=dpi)
+    renderer.close()
+    return filename
+
+
+def _nbytes(obj, seen=None):
+    """Get the memory (in bytes) held by the arrays in `obj`, which may be nested in containers, `RaggedArray`,
+    `RingBuffer`, `ImagePyramid`, or `LinePyramid`. Memory-mapped and shared arrays aren't counted, and memory shared by several arrays
+    is only counted once."""
+    if seen is None:
+        seen = set()
+    if isinstance(obj, np.ndarray):
+        base = obj
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        # Arrays over memory which numpy doesn't own (e.g. `SharedData`) aren't counted either:
+        if isinstance(base, np.memmap) or base.base is not None or id(base) in seen:
+            return 0
+        seen.add(id(base))
+        return base.nbytes
+    if isinstance(obj, dict):
+        return sum(_nbytes(x, seen) for x in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(_nbytes(x, seen) for x in obj)
+    if isinstance(obj, (RaggedArray, RingBuffer, ImagePyramid, LinePyramid)):
+        return _nbytes(vars(obj), seen)
+    return 0
+
+
+def _replaceFile(filename, write):
+    """Write a file by writing a temporary file in the same folder, which then replaces it. Unlike writing the file in
+    place, this doesn't truncate it while it's being read, e.g. when it's memory-mapped.
+
+    :param filename: The file to write
+    :param write: Called as `write(name)` with the name of the temporary file, which has the same extension
+    """
+    fd, temp = tempfile.mkstemp(suffix=os.path.splitext(filename)[1], dir=os.path.dirname(os.path.abspath(filename)))
+    os.close(fd)
+    try:
+        write(temp)
+        os.replace(temp, filename)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def _visibleRange(x, xmin, xmax):
+    """Get the index range of the sorted array `x` within `[xmin, xmax]`, plus one point on either side."""
+    lo = max(int(np.searchsorted(x, xmin, 'left')) - 1, 0)
+    hi = min(int(np.searchsorted(x, xmax, 'right')) + 1, len(x))
+    return lo, hi
+
+
+def _chunks(data, chunk, overlap=0):
+    """Iterate over `data` along its first axis in parts of `chunk` values, as `(start, part)` with each part read into
+    memory. Large data is processed this way throughout this module, so that memory-mapped arrays are read sequentially
+    and no temporary array is as large as the data.
+
+    :param overlap: (optional) The number of values each part shares with the next [default=0]
+    """
+    for a in range(0, max(len(data) - overlap, 0), chunk):
+        yield a, np.asarray(data[a:a+chunk+overlap])
+
+
+def _isSorted(x, chunk=2**22):
+    """Check whether `x` is sorted, in chunks (see `_chunks`)."""
+    for a, part in _chunks(x, chunk, overlap=1):
+        if not np.all(part[1:] >= part[:-1]):
+            return False
+    return True
+
+
+def minMaxDecimate(x, y, xmin, xmax, width, log=False, chunk=2**20, pyramid=None):
+    """Decimate a line for drawing by keeping the minimum and maximum `y` of the points in each pixel column, which
+    draws the same as the full line as long as the columns are no wider than a pixel. The columns are processed in
+    groups of about `chunk` points (see `_chunks`).
+
+    :param x: The x values, must be sorted
+    :param y: The y values
+    :param xmin: The lowest x value to keep, points outside `[xmin, xmax]` are dropped
+    :param xmax: The highest x value to keep
+    :param width: The number of pixel columns
+    :param log: (optional) Whether the x axis is logarithmic [default=False]
+    :param chunk: (optional) The approximate number of points to process at once [default=2**20]
+    :param pyramid: (optional) A `LinePyramid` of `y`, which is used instead of the points when there are many per
+    column. The columns are then rounded to whole blocks of the pyramid, moving them by at most 1/32 of a column.
+    :returns: The sorted indices of the points to keep
+    """
+    lo, hi = _visibleRange(x, xmin, xmax)
+    if hi - lo <= 4*width:
+        return np.arange(lo, hi)
+
+    # Boundaries of the pixel columns, as indices into the data:
+    if log and x[lo] > 0:
+        edges = np.logspace(np.log10(x[lo]), np.log10(x[hi-1]), width+1)
+    else:
+        edges = np.linspace(x[lo], x[hi-1], width+1)
+    starts = np.unique(lo + np.searchsorted(x[lo:hi], edges[:-1], 'left'))
+
+    index = [np.array([lo, hi-1])]
+    # The largest blocks with at least `FACTOR` per column on average:
+    k = 0
+    if pyramid is not None:
+        while LinePyramid.FACTOR**(k+2) <= (hi - lo) / len(starts):
+            k += 1
+    if k > 0:
+        b = LinePyramid.FACTOR**k
+        first, last = lo // b, -(-hi // b)
+        bounds = np.unique(np.append(np.clip(np.rint(starts / b).astype(np.intp), first, last-1), first)) - first
+        ids = np.repeat(np.arange(len(bounds)), np.diff(np.append(bounds, last-first)))
+        lowIndex, lowValue, highIndex, highValue = pyramid.level(k)
+        for values, indices, reduce in [(lowValue, lowIndex, np.minimum), (highValue, highIndex, np.maximum)]:
+            segment = values[first:last]
+            hits = np.flatnonzero(segment == reduce.reduceat(segment, bounds)[ids])
+            columns = ids[hits]
+            keep = np.ones(len(hits), dtype=bool)
+            keep[1:] = columns[1:] != columns[:-1]
+            index.append(indices[first:last][hits[keep]])
+        index = np.unique(np.concatenate(index))
+        # The blocks at either end may reach past the range:
+        return index[(index >= lo) & (index < hi)]
+
+    # Group the columns into chunks of about `chunk` points:
+    bounds = np.unique(np.searchsorted(starts, np.arange(lo, hi, chunk), 'right') - 1)
+    bounds = np.append(bounds, len(starts))
+    for j in range(len(bounds)-1):
+        first = starts[bounds[j]:bounds[j+1]]
+        a = first[0]
+        b = starts[bounds[j+1]] if bounds[j+1] < len(starts) else hi
+        segment = np.asarray(y[a:b])
+        offsets = first - a
+        ids = np.repeat(np.arange(len(offsets)), np.diff(np.append(offsets, b-a)))
+        for extreme in [np.fmin.reduceat(segment, offsets), np.fmax.reduceat(segment, offsets)]:
+            # The first point in each column which has the extreme value:
+            hits = np.flatnonzero(segment == extreme[ids])
+            columns = ids[hits]
+            keep = np.ones(len(hits), dtype=bool)
+            keep[1:] = columns[1:] != columns[:-1]
+            index.append(hits[keep] + a)
+
+    return np.unique(np.concatenate(index))
+
+
+def lttbDecimate(x, y, xmin, xmax, width):
+    """Decimate a line for drawing with the largest triangle three buckets (LTTB) algorithm, which keeps the points
+    that best preserve the visual shape of the line. Two points are kept per pixel column.
+
+    :param x: The x values, must be sorted
+    :param y: The y values
+    :param xmin: The lowest x value to keep, points outside `[xmin, xmax]` are dropped
+    :param xmax: The highest x value to keep
+    :param width: The number of pixel columns
+    :returns: The sorted indices of the points to keep
+    """
+    lo, hi = _visibleRange(x, xmin, xmax)
+    n = 2*width
+    if hi - lo <= n:
+        return np.arange(lo, hi)
+
+    # Bucket boundaries, the first and last buckets are just the end points:
+    edges = lo + 1 + ((hi - lo - 2) * np.arange(n-1) // (n-2))
+    index = np.empty(n, dtype=np.intp)
+    index[0] = lo
+    index[-1] = hi - 1
+    a = lo
+    for k in range(n-2):
+        start, end = edges[k], edges[k+1]
+        nextEnd = edges[k+2] if k+2 < n-1 else hi
+        avgX = np.mean(x[end:nextEnd])
+        avgY = np.mean(y[end:nextEnd])
+        area = np.abs((x[a] - avgX) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avgY - y[a]))
+        a = start + int(np.argmax(area))
+        index[k+1] = a
+    return index
+
+
+def histogramRange(data, chunk=2**22):
+    """Get the range of a histogram of `data` (the minimum and maximum, ignoring NaN), in chunks (see `_chunks`)."""
+    low, high = np.inf, -np.inf
+    for a, part in _chunks(data, chunk):
+        part = part[np.isfinite(part)]
+        if len(part) > 0:
+            low, high = min(low, part.min()), max(high, part.max())
+    if low > high:
+        return 0., 1.
+    if low == high:  # same as `numpy.histogram`
+        return low - 0.5, high + 0.5
+    return low, high
+
+
+def histogram(data, bins, binRange=None, weights=None, chunk=2**22):
+    """Count `data` into histogram bins, in chunks (see `_chunks`). Values equal to the last edge are counted in the
+    last bin, as in `numpy.histogram`.
+
+    :param data: The values to count, a 1-D array
+    :param bins: Either the number of equal-width bins, or an array of bin edges
+    :param binRange: (optional) The range of the bins as `(low, high)`, required if `bins` is a number [default=None]
+    :param weights: (optional) Weights for each value, with the same shape as `data` [default=None]
+    :param chunk: (optional) The number of values to process at once [default=2**22]
+    :returns: The counts in each bin, `float` if weighted and `int` otherwise
+    """
+    if np.ndim(bins) == 0:
+        n = int(bins)
+        low, high = binRange
+        scale = n / (high - low)
+        edges = None
+    else:
+        edges = np.asarray(bins, dtype=float)
+        n = len(edges) - 1
+        low, high = edges[0], edges[-1]
+
+    counts = np.zeros(n, dtype=float if weights is not None else np.int64)
+    for a, part in _chunks(data, chunk):
+        valid = (part >= low) & (part <= high)
+        part = part[valid]
+        if edges is None:
+            index = np.minimum(((part - low) * scale).astype(np.intp), n - 1)
+        else:
+            index = np.minimum(np.searchsorted(edges, part, 'right') - 1, n - 1)
+        w = None if weights is None else np.asarray(weights[a:a+chunk])[valid]
+        counts += np.bincount(index, weights=w, minlength=n).astype(counts.dtype)
+    return counts
+
+
+def histogram2d(x, y, bins, binRange, chunk=2**22, threads=None):
+    """Count points into a 2-D histogram, in chunks (see `_chunks`) which are counted by parallel threads into one
+    grid.
+
+    :param x: The x values, a 1-D array
+    :param y: The y values, with the same shape as `x`
+    :param bins: The number of bins along each axis as `(nx, ny)`
+    :param binRange: The range of the bins as `((xmin, xmax), (ymin, ymax))`
+    :param chunk: (optional) The number of points to process at once [default=2**22]
+    :param threads: (optional) The number of threads to use [default=number of CPUs]
+    :returns: The counts in each bin, with shape `(ny, nx)`
+    """
+    nx, ny = bins
+    (xmin, xmax), (ymin, ymax) = binRange
+    xScale = nx / (xmax - xmin) if xmax > xmin else 0.
+    yScale = ny / (ymax - ymin) if ymax > ymin else 0.
+
+    def count(a):
+        px = np.asarray(x[a:a+chunk])
+        py = np.asarray(y[a:a+chunk])
+        valid = (px >= xmin) & (px <= xmax) & (py >= ymin) & (py <= ymax)
+        ix = np.minimum(((px[valid] - xmin) * xScale).astype(np.intp), nx - 1)
+        iy = np.minimum(((py[valid] - ymin) * yScale).astype(np.intp), ny - 1)
+        return np.bincount(iy * nx + ix, minlength=nx*ny)
+
+    counts = np.zeros(nx*ny, dtype=np.int64)
+    starts = range(0, len(x), chunk)
+    if len(starts) <= 1:
+        for a in starts:
+            counts += count(a)
+    else:
+        with futures.ThreadPoolExecutor(threads) as pool:
+            for part in pool.map(count, starts):
+                counts += part
+    return counts.reshape((ny, nx))
+
+
+def _indexRange(values, low, high):
+    """Get the index range of `values` within `[low, high]`, if `values` is sorted in either direction, or all
+    indices otherwise."""
+    if len(values) > 1 and values[-1] < values[0]:
+        i0, i1 = _indexRange(values[::-1], low, high)
+        return len(values) - i1, len(values) - i0
+    if not _isSorted(values):
+        return 0, len(values)
+    return int(np.searchsorted(values, low, 'left')), int(np.searchsorted(values, high, 'right'))
+
+
+class ImagePyramid(object):
+    """Multi-resolution (mipmap) levels of a 2-D array, for drawing large images at the resolution of the screen.
+    Level 0 is the array itself, and each following level averages 2x2 blocks of the previous one. Levels are built
+    only when first requested, in chunks of rows.
+
+    :param data: The 2-D array, or 3-D for RGB(A) images with the color as the last axis
+    :param chunk: (optional) The approximate number of values to process at once [default=2**22]
+    """
+
+    def __init__(self, data, chunk=2**22):
+        self.levels = [data]
+        self.shape = data.shape
+        self.chunk = chunk
+        self.maxLevel = 0
+        while (self.shape[0] >> (self.maxLevel + 1)) > 0 and (self.shape[1] >> (self.maxLevel + 1)) > 0:
+            self.maxLevel += 1
+
+    def level(self, k):
+        """Get level `k` of the pyramid, with shape `(rows >> k, cols >> k)`."""
+        k = min(k, self.maxLevel)
+        while len(self.levels) <= k:
+            self.levels.append(self.__downsample__(self.levels[-1]))
+        return self.levels[k]
+
+    def __downsample__(self, data):
+        """Average 2x2 blocks of `data`."""
+        rows, cols = data.shape[0] // 2, data.shape[1] // 2
+        # Color images keep their type so they are drawn the same way, other data is averaged as floating point:
+        if np.issubdtype(data.dtype, np.floating) or len(data.shape) == 3:
+            dtype = data.dtype
+        else:
+            dtype = np.float32
+        result = np.empty((rows, cols) + data.shape[2:], dtype=dtype)
+        step = max(self.chunk // max(data.shape[1], 1) // 2, 1)
+        for r in range(0, rows, step):
+            block = np.asarray(data[2*r:2*min(r+step, rows), :2*cols], dtype=float)
+            block = block.reshape((-1, 2, cols, 2) + data.shape[2:]).mean(axis=(1, 3))
+            result[r:r+step] = block.astype(dtype) if np.issubdtype(dtype, np.floating) else np.round(block).astype(dtype)
+        return result
+
+
+class LinePyramid(object):
+    """Levels of the extremes of a line's y values, for min/max decimation of many points per pixel column (see
+    `minMaxDecimate`). Level `k` holds the indices and values of the lowest and highest point of each block of
+    `FACTOR**k` points, and is built from the previous level. Level 0 is the points themselves. Levels are built only
+    when first requested, in chunks. NaN values are never extremes.
+
+    :param y: The y values, a 1-D array
+    :param chunk: (optional) The approximate number of values to process at once [default=2**22]
+    """
+    # Number of blocks (or points) of each level in a block of the next:
+    FACTOR = 16
+
+    def __init__(self, y, chunk=2**22):
+        self.levels = [None]
+        self.y = y
+        self.chunk = chunk
+
+    def level(self, k):
+        """Get level `k` (at least 1) of the pyramid, as the arrays `(lowIndex, lowValue, highIndex, highValue)` with
+        one entry per block. The last block may be partial."""
+        while len(self.levels) <= k:
+            self.levels.append(self.__extremes__(len(self.levels)))
+        return self.levels[k]
+
+    def __extremes__(self, k):
+        """Find the extremes of each block of level `k`, from the extremes of `FACTOR` blocks of level `k-1`."""
+        n = len(self.y) if k == 1 else len(self.levels[k-1][0])
+        blocks = -(-n // self.FACTOR)
+        result = (np.empty(blocks, dtype=np.intp), np.empty(blocks), np.empty(blocks, dtype=np.intp), np.empty(blocks))
+        step = max(self.chunk // self.FACTOR, 1) * self.FACTOR
+        for a in range(0, n, step):
+            if k == 1:
+                values = np.asarray(self.y[a:a+step], dtype=float)
+                sources = [(None, values), (None, values)]
+                if np.isnan(values).any():
+                    sources = [(None, np.where(np.isnan(values), np.inf, values)),
+                               (None, np.where(np.isnan(values), -np.inf, values))]
+            else:
+                lowIndex, lowValue, highIndex, highValue = self.levels[k-1]
+                sources = [(lowIndex[a:a+step], lowValue[a:a+step]), (highIndex[a:a+step], highValue[a:a+step])]
+            rows = -(-len(sources[0][1]) // self.FACTOR)
+            out = slice(a // self.FACTOR, a // self.FACTOR + rows)
+            for j, (indices, values) in enumerate(sources):
+                # Partial blocks are padded with values which are never the extreme:
+                fill = np.inf if j == 0 else -np.inf
+                if len(values) < rows * self.FACTOR:
+                    values = np.append(values, np.full(rows * self.FACTOR - len(values), fill))
+                values = values.reshape((rows, -1))
+                best = np.argmin(values, axis=1) if j == 0 else np.argmax(values, axis=1)
+                position = np.arange(rows) * self.FACTOR + best
+                if indices is None:
+                    result[2*j][out] = a + position
+                else:
+                    result[2*j][out] = indices[np.minimum(position, len(indices) - 1)]
+                result[2*j+1][out] = values.reshape(-1)[position]
+        return result
+
+
+class RaggedArray(object):
+    """Several data series with different numbers of points, stored compactly in one buffer. The series are
+    concatenated along the last axis of the buffer, with `offsets[i]` the index where series `i` starts. Indexing
+    returns a view of one series without copying::
+
+        r = RaggedArray.fromList([np.zeros((2,10)), np.zeros((2,1000))])
+        r[1].shape  # (2, 1000)
+
+    :param buffer: The concatenated series, of shape `(rows, total)` or `(total,)`
+    :param offsets: The start index of each series in `buffer`, followed by the total length
+    """
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        assert len(self.offsets) >= 1 and self.offsets[-1] == buffer.shape[-1]
+
+    @classmethod
+    def fromList(cls, arrays):
+        """Create from a `list` of series, which must have the same shape except for the number of points.
+
+        :param arrays: The series to store
+        """
+        arrays = [np.asarray(a) for a in arrays]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum([a.shape[-1] for a in arrays])
+        return cls(np.concatenate(arrays, axis=-1), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError('series index out of range: ' + str(i))
+        i %= len(self)
+        return self.buffer[..., self.offsets[i]:self.offsets[i+1]]
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+
+class RingBuffer(object):
+    """Storage for a stream of multi-valued points, e.g. (x, y), with amortized O(1) appends. The stored points are
+    always available as one contiguous `numpy.ndarray` view, oldest first.
+
+    If `maxlen` is given, the buffer has a fixed capacity and the oldest points are discarded once it is full. To keep
+    the view contiguous, every point is written twice into an array of twice the capacity. Otherwise, the storage
+    doubles in size whenever it fills up.
+
+    :param rows: The number of values for each point
+    :param capacity: (optional) The number of points to allocate room for initially [default=1024]
+    :param maxlen: (optional) The maximum number of points to keep, or `None` for no limit [default=None]
+    :param dtype: (optional) The data type to store [default=float]
+    """
+
+    def __init__(self, rows, capacity=1024, maxlen=None, dtype=float):
+        if maxlen is not None:
+            capacity = maxlen
+            self.buffer = np.empty((rows, 2*capacity), dtype=dtype)
+        else:
+            self.buffer = np.empty((rows, max(capacity, 1)), dtype=dtype)
+        self.capacity = max(capacity, 1)
+        self.maxlen = maxlen
+        self.start = 0
+        self.size = 0
+        # The number of points discarded from the front, so that `dropped + len(self)` is the number ever appended:
+        self.dropped = 0
+
+    def __len__(self):
+        return self.size
+
+    def view(self):
+        """Get the stored points as a `(rows, len)` view, oldest first."""
+        return self.buffer[:, self.start:self.start+self.size]
+
+    def extend(self, values):
+        """Append points to the buffer.
+
+        :param values: The new points, must be convertible to an array of shape `(rows, n)`
+        """
+        values = np.asarray(values, dtype=self.buffer.dtype)
+        n = values.shape[1]
+        if n == 0:
+            return
+
+        # Growable buffer:
+        if self.maxlen is None:
+            if self.size + n > self.capacity:
+                while self.size + n > self.capacity:
+                    self.capacity *= 2
+                buffer = np.empty((self.buffer.shape[0], self.capacity), dtype=self.buffer.dtype)
+                buffer[:, :self.size] = self.buffer[:, :self.size]
+                self.buffer = buffer
+            self.buffer[:, self.size:self.size+n] = values
+            self.size += n
+            return
+
+        # Fixed capacity, only the newest points can be kept:
+        if n > self.capacity:
+            values = values[:, n-self.capacity:]
+            self.dropped += n - self.capacity
+            n = self.capacity
+        end = (self.start + self.size) % self.capacity
+        first = min(n, self.capacity - end)
+        self.buffer[:, end:end+first] = values[:, :first]
+        self.buffer[:, end+self.capacity:end+self.capacity+first] = values[:, :first]
+        self.buffer[:, :n-first] = values[:, first:]
+        self.buffer[:, self.capacity:self.capacity+n-first] = values[:, first:]
+
+        self.size += n
+        if self.size > self.capacity:
+            self.start = (self.start + self.size - self.capacity) % self.capacity
+            self.dropped += self.size - self.capacity
+            self.size = self.capacity
+
+
+class SharedData(object):
+    """An array in shared memory, which windows and processes attach to by name so that they all view the same data
+    without copies. The memory starts with a header giving the data type and shape, and a version counter which the
+    writer increments (see `touch`) so that windows know to redraw::
+
+        # in the producer:
+        shared = SharedData.create('scope', (2, 100000))
+        shared.array[:] = samples
+        shared.touch()
+        # in any process:
+        Plot('shm://scope')
+
+    Each process maps the memory once however many windows view it, and keeps it mapped until `close` is called,
+    because arrays viewing it must not outlive the mapping. Use `create` or `attach` rather than the constructor.
+
+    :param memory: The `multiprocessing.shared_memory.SharedMemory`
+    """
+    # Prefix for attaching by name wherever a file name is accepted:
+    PREFIX = 'shm://'
+    MAGIC = b'mplWndw1'
+    # Magic, version, dtype, number of dimensions, and shape:
+    HEADER_FORMAT = '<8sQ16sQ8q'
+    HEADER_SIZE = 128
+    MAX_DIMS = 8
+    # The memory mapped by this process, by name:
+    memories = {}
+
+    def __init__(self, memory):
+        magic, version, dtype, ndim, *shape = struct.unpack_from(self.HEADER_FORMAT, memory.buf)
+        if magic != self.MAGIC:
+            raise ValueError('not mplWindow shared data: ' + memory.name)
+        self.memory = memory
+        self.name = memory.name.lstrip('/')
+        self.counter = np.ndarray((), dtype='<u8', buffer=memory.buf, offset=struct.calcsize('<8s'))
+        self.array = np.ndarray(tuple(shape[:ndim]), dtype=np.dtype(dtype.rstrip(b'\0').decode()),
+                                buffer=memory.buf, offset=self.HEADER_SIZE)
+
+    def __reduce__(self):
+        # Other processes attach to the memory rather than copying it:
+        return (SharedData.attach, (self.name,))
+
+    @classmethod
+    def create(cls, name, shape, dtype=float):
+        """Make new shared data, initially zero.
+
+        :param name: The name for other processes to attach with, or `None` for a unique name (see `name`)
+        :param shape: The shape of the array
+        :param dtype: (optional) The data type [default=float]
+        :returns: The `SharedData`
+        """
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        if len(shape) > cls.MAX_DIMS:
+            raise ValueError('shared data can have at most ' + str(cls.MAX_DIMS) + ' dimensions')
+        size = cls.HEADER_SIZE + max(int(np.prod(shape)) * dtype.itemsize, 1)
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        struct.pack_into(cls.HEADER_FORMAT, memory.buf, 0, cls.MAGIC, 0, dtype.str.encode(), len(shape),
+                         *(shape + (0,) * (cls.MAX_DIMS - len(shape))))
+        cls.memories[memory.name.lstrip('/')] = memory
+        return cls(memory)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to existing shared data.
+
+        :param name: The name it was created with
+        :returns: The `SharedData`
+        """
+        if name not in cls.memories:
+            memory = shared_memory.SharedMemory(name=name)
+            if os.name == 'posix':
+                # Only the creator should remove the memory, but attaching registers it to be removed at exit too:
+                resource_tracker.unregister(memory._name, 'shared_memory')
+            cls.memories[name] = memory
+        return cls(cls.memories[name])
+
+    @property
+    def version(self):
+        """The number of times the data has been changed, see `touch`."""
+        return int(self.counter)
+
+    def touch(self):
+        """Mark the data as changed after writing to `array`, so that windows viewing it redraw."""
+        self.counter += 1
+
+    def view(self):
+        """Get a read-only view of the data."""
+        data = self.array.view()
+        data.flags.writeable = False
+        return data
+
+    def close(self):
+        """Unmap the memory from this process. Nothing (including windows) may use the data afterwards."""
+        self.array = None
+        self.counter = None
+        memory = SharedData.memories.pop(self.name, None)
+        if memory is not None:
+            memory.close()
+
+    def unlink(self):
+        """Remove the memory once every process has closed it, so that it can't be attached to any more. Called by the
+        process which created it."""
+        self.memory.unlink()
+
+
+class Channel(object):
+    """A bounded queue of points for a plot, which producers in any thread can push batches of points to without
+    blocking, see `Plot.channel`. Tk isn't thread-safe, so the plot drains the queue from its own thread instead.
+    Appending to and popping from a `collections.deque` are atomic, so no lock is needed for either::
+
+        channel = plot.channel(maxlen=256, drop='oldest')
+        # in the acquisition thread:
+        channel.push(0, times, values)
+
+    When the queue is full, either the oldest queued batch or the new one is dropped, and counted in `dropped`.
+
+    Other processes can't share the queue, instead they put `(series, x, y)` tuples into a `multiprocessing.Queue`
+    given as `source`, which is moved into this queue whenever it is drained. Putting `None` closes the channel.
+
+    :param maxlen: (optional) The maximum number of batches to queue [default=1024]
+    :param drop: (optional) Which batch to drop when the queue is full, `DROP_OLDEST` or `DROP_NEWEST`
+    [default=DROP_OLDEST]
+    :param source: (optional) A `multiprocessing.Queue` of batches from other processes
+    """
+    DROP_OLDEST = 'oldest'
+    DROP_NEWEST = 'newest'
+
+    def __init__(self, maxlen=1024, drop=DROP_OLDEST, source=None):
+        if drop not in [self.DROP_OLDEST, self.DROP_NEWEST]:
+            raise ValueError('unknown drop policy: ' + str(drop))
+        # A full deque with a maximum length discards its oldest item when appended to:
+        self.items = collections.deque(maxlen=maxlen if drop == self.DROP_OLDEST else None)
+        self.maxlen = maxlen
+        self.drop = drop
+        self.source = source
+        self.dropped = 0
+        self.closed = False
+        # Only needed to count dropped batches, pushing never waits for it otherwise:
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def push(self, series, x, y=None):
+        """Queue points for a series, as for `Plot.extend`. This never blocks, and can be called from any thread.
+
+        :param series: The index of the series to append to
+        :param x: The x values of the new points, or the values for histograms
+        :param y: The y values of the new points, if the series has them
+        :returns: `False` if the points were dropped, because the channel is closed or full (with `DROP_NEWEST`)
+        """
+        if self.closed:
+            return False
+        if len(self.items) >= self.maxlen:
+            with self.lock:
+                self.dropped += 1
+            if self.drop == self.DROP_NEWEST:
+                return False
+        self.items.append((series, x, y))
+        return True
+
+    def drain(self):
+        """Take the queued batches, including any from `source`. Only the plot's thread should call this.
+
+        :returns: A list of `(series, x, y)` batches, oldest first
+        """
+        if self.source is not None and not self.closed:
+            # Take at most a full queue, so that a fast producer can't keep this going forever:
+            for i in range(self.maxlen):
+                try:
+                    batch = self.source.get_nowait()
+                except queue.Empty:
+                    break
+                if batch is None:
+                    self.closed = True
+                    break
+                self.push(*batch)
+        batches = []
+        for i in range(len(self.items)):
+            batches.append(self.items.popleft())
+        return batches
+
+    def close(self):
+        """Stop accepting points. Points already queued are still added to the plot."""
+        self.closed = True
 
 
 class textPrompt(tk.Toplevel):
@@ -18,11 +18,192 @@
 
 __author__ = 'Alex Zylstra'
 
-from mplWindow import Plot
+from mplWindow import Plot, Renderer, RingBuffer, SharedData, minMaxDecimate, lttbDecimate, LinePyramid, histogram, histogram2d
 import numpy as np
+import collections
 import tkinter as tk
 import tkinter.ttk as ttk
 import matplotlib
+import os
+import subprocess
+import sys
+import tempfile
+
+# Time (s) allowed for importing mplWindow, which should only import the plotting libraries when a plot is made:
+IMPORT_BUDGET = 0.1
+
+def checkImportTime():
+    """Check that importing mplWindow (in a new interpreter) is within `IMPORT_BUDGET`, and doesn't import numpy or
+    matplotlib. The best of a few tries is used, so that a slow start of the interpreter doesn't count."""
+    code = 'import sys, time; t = time.perf_counter(); import mplWindow; print(time.perf_counter() - t); ' \
+           'print([m for m in ["numpy", "matplotlib", "tkinter.ttk"] if m in sys.modules])'
+    times = []
+    for i in range(3):
+        out = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                      universal_newlines=True).split('\n')
+        times.append(float(out[0]))
+        assert out[1] == '[]', 'importing mplWindow also imported ' + out[1]
+    print('import mplWindow: {:.1f} ms (budget {:.0f} ms)'.format(1000 * min(times), 1000 * IMPORT_BUDGET))
+    assert min(times) < IMPORT_BUDGET, 'importing mplWindow is too slow'
+
+def checkRingBuffer():
+    """Check that a `RingBuffer` keeps the same points as a `deque` with the same `maxlen`, including after the fixed
+    capacity buffers wrap around, and for batches longer than the capacity."""
+    rng = np.random.RandomState(0)
+    for maxlen in [None, 1, 7, 16]:
+        ring = RingBuffer(2, capacity=4, maxlen=maxlen)
+        expected = collections.deque(maxlen=maxlen)
+        count = 0
+        for n in rng.randint(0, 20, 50):
+            points = np.arange(count, count + n)
+            count += n
+            ring.extend([points, -points])
+            expected.extend(points)
+            view = ring.view()
+            assert len(ring) == len(expected) and view.shape == (2, len(expected))
+            assert np.array_equal(view[0], list(expected)) and np.array_equal(view[1], [-p for p in expected])
+    # Streaming floats into integer data keeps them:
+    renderer = Renderer(np.asarray([[1,2,3],[1,2,3]]))
+    renderer.append(0, 3.5, 2.75)
+    assert np.array_equal(renderer.buffers[0].view(), [[1, 2, 3, 3.5], [1, 2, 3, 2.75]])
+    renderer.close()
+    print('RingBuffer: ok')
+
+def checkDecimation():
+    """Check that min/max decimation keeps the minimum and maximum of every pixel column in the view, plus the points
+    on either side of it, and that LTTB keeps two points per column including the end points."""
+    rng = np.random.RandomState(1)
+    x = np.sort(rng.uniform(1, 100, 100000))
+    y = rng.normal(size=len(x))
+    xmin, xmax, width = 10., 90., 300
+    lo = np.searchsorted(x, xmin) - 1
+    hi = np.searchsorted(x, xmax, 'right') + 1
+    for log in [False, True]:
+        # Columns of equal width in the x scale, each starting at its left edge:
+        if log:
+            edges = np.logspace(np.log10(x[lo]), np.log10(x[hi-1]), width + 1)
+        else:
+            edges = np.linspace(x[lo], x[hi-1], width + 1)
+        columns = np.clip(np.searchsorted(edges, x[lo:hi], 'right') - 1, 0, width - 1)
+        for chunk in [2**20, 1000]:
+            index = minMaxDecimate(x, y, xmin, xmax, width, log=log, chunk=chunk)
+            assert np.all(np.diff(index) > 0) and index[0] == lo and index[-1] == hi - 1
+            kept = columns[index - lo]
+            for k in range(width):
+                column = y[lo:hi][columns == k]
+                values = y[index[kept == k]]
+                assert len(column) == 0 or (values.min() == column.min() and values.max() == column.max())
+    # The levels of a pyramid hold the extremes of each block, with a partial last block, NaN, and several chunks:
+    z = y[:-5].copy()
+    z[7] = np.nan
+    pyramid = LinePyramid(z, chunk=1000)
+    for k in [1, 2]:
+        blocks = np.append(z, np.full(-len(z) % LinePyramid.FACTOR**k, np.nan)).reshape((-1, LinePyramid.FACTOR**k))
+        lowIndex, lowValue, highIndex, highValue = pyramid.level(k)
+        assert np.array_equal(lowValue, np.nanmin(blocks, axis=1)) and np.array_equal(z[lowIndex], lowValue)
+        assert np.array_equal(highValue, np.nanmax(blocks, axis=1)) and np.array_equal(z[highIndex], highValue)
+    # Decimating from the pyramid keeps the extremes too:
+    index = minMaxDecimate(x, y, -np.inf, np.inf, 100, pyramid=LinePyramid(y))
+    assert np.all(np.diff(index) > 0) and index[0] == 0 and index[-1] == len(x) - 1 and len(index) <= 2 * 100 + 2
+    assert y[index].min() == y.min() and y[index].max() == y.max()
+    index = lttbDecimate(x, y, xmin, xmax, width)
+    assert len(index) == 2 * width and np.all(np.diff(index) > 0) and index[0] == lo and index[-1] == hi - 1
+    print('decimation: ok')
+
+def checkStreaming():
+    """Check that the caches of streamed series, which are updated with only the appended points, match the data:
+    histogram counts while the bins stay the same, and whether x is sorted, also after points are dropped."""
+    rng = np.random.RandomState(4)
+    renderer = Renderer(rng.normal(size=1000), plotType=Renderer.TYPE_HISTOGRAM, maxPoints=2000)
+    for n in [1, 10, 100, 2000]:
+        renderer.extend(0, rng.uniform(-1, 1, n))
+        renderer.__flush__()
+        cache = renderer.histCache[0]
+        for key in cache['counts']:
+            bins, binRange = cache['bins'][key]
+            assert np.array_equal(cache['counts'][key], np.histogram(renderer.buffers[0].view()[0], bins, binRange)[0])
+    renderer.close()
+    n = Renderer.DECIMATE_MIN_POINTS
+    renderer = Renderer(np.vstack([np.arange(float(n)), np.zeros(n)]), decimate='minmax', maxPoints=n + 1000)
+    for x, expected in [(n, True), (1., False), (n + 1., False), (np.arange(n + 1000.) + n + 2, True)]:
+        renderer.extend(0, np.atleast_1d(x), np.zeros(np.size(x)))
+        renderer.__flush__()
+        assert renderer.sortedX[0][1] == expected
+    renderer.close()
+    print('streaming: ok')
+
+def checkHistogram():
+    """Check that `histogram` counts the same as `numpy.histogram`, for values on the bin edges (including the last)
+    and outside the range, with equal-width bins or edges, weights, and chunks."""
+    rng = np.random.RandomState(2)
+    # Quarters are exact in binary, so that values on the edges fall in the same bin either way:
+    data = rng.randint(-4, 45, 10000) / 4.
+    weights = rng.uniform(size=len(data))
+    edges = [0., 0.5, 2., 2.25, 7., 10.]
+    for chunk in [2**22, 999]:
+        assert np.array_equal(histogram(data, 20, (0., 10.), chunk=chunk), np.histogram(data, 20, (0., 10.))[0])
+        assert np.array_equal(histogram(data, edges, chunk=chunk), np.histogram(data, edges)[0])
+        assert np.allclose(histogram(data, 20, (0., 10.), weights=weights, chunk=chunk),
+                           np.histogram(data, 20, (0., 10.), weights=weights)[0])
+    print('histogram: ok')
+
+def checkHistogram2d():
+    """Check that `histogram2d` counts the same as `numpy.histogram2d`, for points on the bin edges and outside the
+    range, counted in one chunk or in parallel chunks."""
+    rng = np.random.RandomState(3)
+    x = rng.randint(-4, 45, 10000) / 4.
+    y = rng.randint(-2, 23, 10000) / 2.
+    expected = np.histogram2d(x, y, (20, 5), ((0., 10.), (0., 10.)))[0].T
+    for chunk in [2**22, 999]:
+        assert np.array_equal(histogram2d(x, y, (20, 5), ((0., 10.), (0., 10.)), chunk=chunk, threads=4), expected)
+    print('histogram2d: ok')
+
+def checkSession():
+    """Check that a session reopens with the same data (memory-mapped), arrays in the keyword args, ragged series, and
+    settings, including when the reopened session is saved over the files its data is mapped from."""
+    rng = np.random.RandomState(5)
+    data = np.vstack([np.arange(1000.), rng.normal(size=1000)])
+    yerr = rng.uniform(size=1000)
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'analysis.json')
+        renderer = Renderer(data, plotType=Renderer.TYPE_ERRORBAR, labels='walk', ylim=(-5, 5), logColor=True,
+                            yerr=yerr)
+        renderer.saveSession(filename)
+        renderer.close()
+        for i in range(2):
+            renderer = Renderer.loadSession(filename)
+            assert isinstance(renderer.data, np.memmap) and np.array_equal(renderer.data, data)
+            assert np.array_equal(renderer.kwargs['yerr'], yerr) and renderer.labels == ['walk']
+            assert renderer.xlim is None and list(renderer.ylim) == [-5, 5] and renderer.logColor.get()
+            assert renderer.decimate.get() == 'minmax'  # the default for memory-mapped data
+            renderer.saveSession(filename)
+            renderer.close()
+        series = [rng.normal(size=(2, n)) for n in [10, 1000]]
+        renderer = Renderer(series)
+        renderer.saveSession(filename)
+        renderer.close()
+        renderer = Renderer.loadSession(filename)
+        assert len(renderer.data) == 2 and all(np.array_equal(renderer.data[i], series[i]) for i in range(2))
+        renderer.close()
+    print('session: ok')
+
+def checkSharedData():
+    """Check that a renderer views `SharedData` by name without copying it, and redraws when its version changes."""
+    shared = SharedData.create(None, (2, 100))
+    shared.array[0] = np.arange(100)
+    shared.array[1] = 1
+    renderer = Renderer(SharedData.PREFIX + shared.name)
+    renderer.__flush__()
+    assert np.shares_memory(renderer.data, shared.array) and not renderer.sync()
+    shared.array[1] = 2
+    shared.touch()
+    assert renderer.sync()
+    renderer.__flush__()
+    assert np.array_equal(renderer.artists[0][0].get_ydata(), shared.array[1]) and not renderer.sync()
+    renderer.close()
+    shared.close()
+    shared.unlink()
+    print('SharedData: ok')
 
 class TestApp(tk.Toplevel):
     """docstring for TestApp"""
@@ -56,6 +237,14 @@ class TestApp(tk.Toplevel):
         self.withdraw()
         self.quit()
         
+checkImportTime()
+checkRingBuffer()
+checkDecimation()
+checkStreaming()
+checkHistogram()
+checkHistogram2d()
+checkSession()
+checkSharedData()
 root = tk.Tk()
 root.withdraw()
 TestApp()